@@ -0,0 +1,28 @@
+"""프로젝트별 분석 캐시(media/analysis/<project_id>/) 경로와 원본 식별 키.
+
+timeline_analysis(파형/장면), signal_analysis(오디오 특징/후보 구간), reframe(크롭 경로)가
+같은 디렉터리와 같은 무효화 기준을 쓰도록 한곳에서 정의합니다.
+"""
+
+import os
+
+from media_cache import media_cache
+
+
+def analysis_dir(project_id: int) -> str:
+    """프로젝트별 분석 캐시 디렉터리. 조회에서 빈 디렉터리가 생기지 않도록 만들지는 않습니다."""
+    return os.path.join(media_cache.class_dir("analysis"), str(project_id))
+
+
+def analysis_path(project_id: int, name: str, create: bool = False) -> str:
+    """분석 캐시 파일 경로. 쓰기 직전에만 create=True로 불러 디렉터리를 만듭니다."""
+    directory = analysis_dir(project_id)
+    if create:
+        os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+
+def source_key(source_path: str) -> str:
+    """원본 파일의 크기와 수정 시각. 캐시에 함께 저장해 원본이 바뀌면 다시 계산합니다."""
+    st = os.stat(source_path)
+    return f"{st.st_size}:{int(st.st_mtime)}"
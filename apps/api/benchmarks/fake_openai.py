@@ -0,0 +1,139 @@
+"""벤치마크용 로컬 OpenAI 호환 서버.
+
+Whisper(`/v1/audio/transcriptions`)와 Chat Completions(`/v1/chat/completions`)
+엔드포인트만 흉내 내며, 응답 자막/하이라이트 개수는 `configure()`로 지정합니다.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _State:
+    def __init__(self):
+        self.duration = 60.0
+        self.subtitle_count = 10
+        self.highlight_count = 3
+        self.latency = 0.0
+        self.requests: list[dict] = []
+        self.lock = threading.Lock()
+
+
+_state = _State()
+
+
+def _transcription_payload() -> dict:
+    count = max(1, _state.subtitle_count)
+    step = _state.duration / count
+    segments = [
+        {
+            "id": i,
+            "seek": 0,
+            "start": round(i * step, 3),
+            "end": round((i + 1) * step, 3),
+            "text": f"벤치마크 자막 라인 {i + 1}번입니다",
+            "tokens": [],
+            "temperature": 0.0,
+            "avg_logprob": 0.0,
+            "compression_ratio": 1.0,
+            "no_speech_prob": 0.0,
+        }
+        for i in range(count)
+    ]
+    return {
+        "task": "transcribe",
+        "language": "korean",
+        "duration": _state.duration,
+        "text": " ".join(s["text"] for s in segments),
+        "segments": segments,
+    }
+
+
+def _chat_payload(prompt_bytes: int) -> dict:
+    count = max(1, _state.highlight_count)
+    span = _state.duration / count
+    length = min(span, 45.0)
+    highlights = [
+        {
+            "title": f"하이라이트 {i + 1}",
+            "start_time": round(i * span, 3),
+            "end_time": round(i * span + length, 3),
+            "reason": "벤치마크",
+        }
+        for i in range(count)
+    ]
+    content = json.dumps({"highlights": highlights}, ensure_ascii=False)
+    prompt_tokens = prompt_bytes // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4o",
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+
+        if self.path.endswith("/audio/transcriptions"):
+            payload = _transcription_payload()
+        elif self.path.endswith("/chat/completions"):
+            payload = _chat_payload(len(body))
+        else:
+            self.send_error(404)
+            return
+
+        with _state.lock:
+            _state.requests.append({"path": self.path, "request_bytes": len(body)})
+
+        if _state.latency:
+            time.sleep(_state.latency)
+
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def configure(duration: float, subtitle_count: int, highlight_count: int = 3, latency: float = 0.0):
+    """다음 요청부터 사용할 응답 크기를 설정합니다."""
+    _state.duration = duration
+    _state.subtitle_count = subtitle_count
+    _state.highlight_count = highlight_count
+    _state.latency = latency
+
+
+def drain_requests() -> list[dict]:
+    """지금까지 받은 요청 기록을 반환하고 비웁니다."""
+    with _state.lock:
+        requests, _state.requests = _state.requests, []
+    return requests
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """백그라운드 스레드에서 서버를 시작합니다. `server.server_port`로 포트를 확인하세요."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
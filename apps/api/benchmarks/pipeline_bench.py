@@ -0,0 +1,401 @@
+"""ingest → STT → 하이라이트 → 렌더 파이프라인 오프라인 벤치마크.
+
+합성 소스(ffmpeg lavfi testsrc2 + sine)와 로컬 가짜 OpenAI 서버를 사용하므로
+네트워크나 API 키 없이 실행됩니다. yt-dlp 다운로드(ingest)는 네트워크 상태에 좌우되어
+측정하지 않으며, 첫 단계(synthesize_source)는 원본을 합성해 프로젝트에 등록할 뿐이므로
+합계는 "원본이 디스크에 있는 상태"부터의 처리 시간입니다. 각 단계는 별도 프로세스에서
+실행되어 단계별 최대 RSS(자식 ffmpeg 포함)를 따로 측정합니다. 최대 RSS는 POSIX의
+`resource` 모듈로 구하므로 Windows에서는 null로 기록됩니다.
+
+사용법 (apps/api 디렉터리에서):
+    python benchmarks/pipeline_bench.py                 # 기본 케이스 실행
+    python benchmarks/pipeline_bench.py --quick         # 짧은 케이스만 실행
+    python benchmarks/pipeline_bench.py --compare old.json new.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import fake_openai
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+SOURCE_FPS = 30
+
+# (이름, 길이(초), 해상도, 자막 라인 수)
+DEFAULT_CASES = [
+    ("short_360p_10", 30, "640x360", 10),
+    ("mid_720p_500", 120, "1280x720", 500),
+    ("long_1080p_5000", 600, "1920x1080", 5000),
+]
+QUICK_CASES = [
+    ("tiny_180p_10", 10, "320x180", 10),
+    ("short_360p_200", 30, "640x360", 200),
+]
+
+STAGES = ["synthesize_source", "audio_extract", "stt", "drawtext", "highlight", "render_highlights", "render_full"]
+
+
+# ── 단계 구현 (자식 프로세스에서 실행) ──────────────────────────────────
+
+
+def _stage_synthesize_source(case: dict, workdir: str) -> dict:
+    from database import SessionLocal, engine
+    import models
+    from revisions import init_revisions
+    from search_index import init_search_index
+
+    source_path = os.path.join(workdir, "uploads", "source.mp4")
+    os.makedirs(os.path.dirname(source_path), exist_ok=True)
+    duration, resolution = case["duration"], case["resolution"]
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size={resolution}:rate={SOURCE_FPS}:duration={duration}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={duration}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest",
+            source_path,
+        ],
+        check=True,
+    )
+
+    # main.py와 같은 스키마(FTS 인덱스, 리비전 트리거 포함)로 만들어야 쓰기 비용이 실제와 같습니다.
+    models.Base.metadata.create_all(bind=engine)
+    init_search_index(engine)
+    init_revisions(engine)
+    db = SessionLocal()
+    try:
+        project = models.Project(title=case["name"], status="ready", source_path=source_path)
+        db.add(project)
+        db.commit()
+        project_id = project.id
+    finally:
+        db.close()
+
+    return {
+        "bytes_written": os.path.getsize(source_path),
+        "frames": duration * SOURCE_FPS,
+        "project_id": project_id,
+        "source_path": source_path,
+    }
+
+
+def _stage_audio_extract(case: dict, workdir: str) -> dict:
+    from routers import ai
+
+    # 합성 소스는 25MB보다 작으므로 항상 추출하도록 임계값을 낮춥니다.
+    ai.WHISPER_FILE_SIZE_LIMIT = 0
+    audio_path, is_temp = ai._extract_audio_if_needed(case["source_path"])
+    size = os.path.getsize(audio_path)
+    if is_temp:
+        os.remove(audio_path)
+    return {"bytes_written": size}
+
+
+def _project_status(project_id: int) -> str:
+    from database import SessionLocal
+    from models import Project
+
+    db = SessionLocal()
+    try:
+        return db.query(Project).filter(Project.id == project_id).first().status
+    finally:
+        db.close()
+
+
+def _project_output_path(project_id: int) -> str:
+    from database import SessionLocal
+    from models import Project
+
+    db = SessionLocal()
+    try:
+        return db.query(Project).filter(Project.id == project_id).first().output_path
+    finally:
+        db.close()
+
+
+def _load_subtitles(project_id: int) -> list:
+    from database import SessionLocal
+    from models import Subtitle
+
+    db = SessionLocal()
+    try:
+        return (
+            db.query(Subtitle)
+            .filter(Subtitle.project_id == project_id)
+            .order_by(Subtitle.start_time)
+            .all()
+        )
+    finally:
+        db.close()
+
+
+def _stage_stt(case: dict, workdir: str) -> dict:
+    from routers import ai
+
+    db_path = os.path.join(workdir, "bench.db")
+    before = os.path.getsize(db_path)
+    ai._transcribe_video(case["project_id"], case["source_path"])
+    status = _project_status(case["project_id"])
+    if status != "ready":
+        raise RuntimeError(f"STT 실패 (status={status})")
+    return {
+        "bytes_written": max(0, os.path.getsize(db_path) - before),
+        "subtitles": len(_load_subtitles(case["project_id"])),
+    }
+
+
+def _stage_drawtext(case: dict, workdir: str) -> dict:
+    from routers import render
+
+    subtitles = _load_subtitles(case["project_id"])
+    iterations = 20
+    for _ in range(iterations):
+        filters = render._build_drawtext_filters(subtitles)
+    return {
+        "bytes_written": 0,
+        "iterations": iterations,
+        "filter_chars": sum(len(f) for f in filters),
+    }
+
+
+def _stage_highlight(case: dict, workdir: str) -> dict:
+    from routers import ai
+
+    ai._extract_highlights_bg(case["project_id"])
+    status = _project_status(case["project_id"])
+    if status != "ready":
+        raise RuntimeError(f"하이라이트 추출 실패 (status={status})")
+    return {"bytes_written": 0}
+
+
+def _render(case: dict, workdir: str, name: str, highlight_ids) -> dict:
+    from routers import render
+
+    output_path = os.path.join(workdir, "outputs", name, "final.mp4")
+    render._render_video(
+        case["project_id"],
+        case["source_path"],
+        output_path,
+        _load_subtitles(case["project_id"]),
+        highlight_ids,
+    )
+    status = _project_status(case["project_id"])
+    if status != "done":
+        raise RuntimeError(f"렌더링 실패 (status={status})")
+    # 결과는 outputs/<id>/<내용 해시>/final.mp4로 옮겨 게시되므로 프로젝트에 기록된 경로를 읽습니다.
+    return {"bytes_written": os.path.getsize(_project_output_path(case["project_id"]))}
+
+
+def _stage_render_highlights(case: dict, workdir: str) -> dict:
+    from database import SessionLocal
+    from models import Highlight
+
+    db = SessionLocal()
+    try:
+        highlights = db.query(Highlight).filter(Highlight.project_id == case["project_id"]).all()
+        highlight_ids = [h.id for h in highlights]
+        frames = int(sum(h.end_time - h.start_time for h in highlights) * SOURCE_FPS)
+    finally:
+        db.close()
+    result = _render(case, workdir, "highlights", highlight_ids)
+    result["frames"] = frames
+    return result
+
+
+def _stage_render_full(case: dict, workdir: str) -> dict:
+    result = _render(case, workdir, "full", None)
+    result["frames"] = case["duration"] * SOURCE_FPS
+    return result
+
+
+_STAGE_FUNCS = {
+    "synthesize_source": _stage_synthesize_source,
+    "audio_extract": _stage_audio_extract,
+    "stt": _stage_stt,
+    "drawtext": _stage_drawtext,
+    "highlight": _stage_highlight,
+    "render_highlights": _stage_render_highlights,
+    "render_full": _stage_render_full,
+}
+
+
+def _stage_worker(stage: str, case: dict, workdir: str, env: dict, conn) -> None:
+    os.environ.update(env)
+    sys.path.insert(0, API_DIR)
+    try:
+        # 모듈 import 시간이 단계 측정값에 섞이지 않도록 미리 불러옵니다.
+        import models  # noqa: F401
+        from routers import ai, render  # noqa: F401
+
+        start = time.perf_counter()
+        result = _STAGE_FUNCS[stage](case, workdir)
+        wall = time.perf_counter() - start
+        peak_rss_kb = None
+        if resource is not None:
+            peak_rss_kb = max(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+            )
+        result["wall_s"] = round(wall, 4)
+        result["peak_rss_kb"] = peak_rss_kb
+        if result.get("frames"):
+            result["encode_fps"] = round(result["frames"] / wall, 2)
+        conn.send({"ok": True, "result": result})
+    except Exception as e:
+        conn.send({"ok": False, "error": str(e)})
+    finally:
+        conn.close()
+
+
+# ── 실행기 (부모 프로세스) ──────────────────────────────────────────────
+
+
+def _run_stage(ctx, stage: str, case: dict, workdir: str, env: dict) -> dict:
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_stage_worker, args=(stage, case, workdir, env, child))
+    proc.start()
+    child.close()
+    message = parent.recv() if parent.poll(timeout=None) else {"ok": False, "error": "no result"}
+    proc.join()
+    if not message["ok"]:
+        return {"error": message["error"]}
+    return message["result"]
+
+
+def run_case(name: str, duration: int, resolution: str, subtitle_count: int, base_url: str) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    workdir = tempfile.mkdtemp(prefix=f"alphacut_bench_{name}_")
+    env = {
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "MEDIA_BASE_PATH": workdir,
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": base_url,
+        "TMPDIR": workdir,
+    }
+    fake_openai.configure(duration=duration, subtitle_count=subtitle_count)
+    case = {"name": name, "duration": duration, "resolution": resolution, "subtitles": subtitle_count}
+    stages: dict[str, dict] = {}
+
+    try:
+        for stage in STAGES:
+            fake_openai.drain_requests()
+            result = _run_stage(ctx, stage, case, workdir, env)
+            requests = fake_openai.drain_requests()
+            if requests:
+                result["api_request_bytes"] = sum(r["request_bytes"] for r in requests)
+            stages[stage] = result
+            print(f"  {name:<20} {stage:<18} " + (
+                f"{result['wall_s']:>9.3f}s" if "wall_s" in result else f"오류: {result['error']}"
+            ))
+            if stage == "synthesize_source":
+                if "error" in result:
+                    break
+                case["project_id"] = result.pop("project_id")
+                case["source_path"] = result.pop("source_path")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "name": name,
+        "duration": duration,
+        "resolution": resolution,
+        "subtitles": subtitle_count,
+        "stages": stages,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=API_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run(cases: list, output_path: str = None) -> dict:
+    server = fake_openai.start_server()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    commit = _git_commit()
+    try:
+        results = [run_case(*c, base_url=base_url) for c in cases]
+    finally:
+        server.shutdown()
+
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "cases": results,
+    }
+
+    if output_path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(RESULTS_DIR, f"{commit[:12]}.json")
+    with open(output_path, "w") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {output_path}")
+    return report
+
+
+def compare(old_path: str, new_path: str) -> None:
+    """두 결과 파일의 단계별 wall time을 비교해 출력합니다."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    old_cases = {c["name"]: c for c in old["cases"]}
+    print(f"{old['commit'][:12]} → {new['commit'][:12]}")
+    print(f"{'case':<20} {'stage':<18} {'old(s)':>9} {'new(s)':>9} {'delta':>8}")
+    for case in new["cases"]:
+        before = old_cases.get(case["name"])
+        if not before:
+            continue
+        for stage, result in case["stages"].items():
+            prev = before["stages"].get(stage, {})
+            if "wall_s" not in result or "wall_s" not in prev:
+                continue
+            delta = (result["wall_s"] - prev["wall_s"]) / prev["wall_s"] * 100 if prev["wall_s"] else 0.0
+            print(
+                f"{case['name']:<20} {stage:<18} {prev['wall_s']:>9.3f} "
+                f"{result['wall_s']:>9.3f} {delta:>+7.1f}%"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Alphacut 파이프라인 벤치마크")
+    parser.add_argument("--quick", action="store_true", help="짧은 케이스만 실행")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="두 결과 파일 비교")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    run(QUICK_CASES if args.quick else DEFAULT_CASES, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""읽기 엔드포인트 부하 테스트 (렌더링 동시 실행 중 폴링 처리량/지연).
+
+임시 DB/미디어 디렉터리로 uvicorn 서버를 띄우고 합성 소스로 렌더링을 동시에
+실행하면서, 에디터가 폴링하는 읽기 엔드포인트(status, progress, subtitles,
+highlights, 목록)에 동시 요청을 보내 요청/초와 p50/p95/p99 지연을 측정합니다.
+--writers는 렌더링 진행 기록처럼 SQLite 쓰기 잠금을 주기적으로 잡는 프로세스를 추가합니다.
+
+사용법 (apps/api 디렉터리에서):
+    python benchmarks/read_path_bench.py                          # 기본: 렌더 2개, 동시 요청 64
+    python benchmarks/read_path_bench.py --renders 4 --writers 2 --concurrency 128
+    python benchmarks/read_path_bench.py --compare old.json new.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+from pipeline_bench import API_DIR, RESULTS_DIR, _git_commit
+
+SUBTITLES_PER_PROJECT = 200
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _make_source(path: str, seconds: int) -> None:
+    subprocess.run(
+        [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"testsrc2=size=1280x720:rate=30:duration={seconds}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest", path,
+        ],
+        check=True,
+    )
+
+
+def _start_server(workdir: str, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        MEDIA_BASE_PATH=os.path.join(workdir, "media"),
+        ASYNC_DATABASE_URL="",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        # 종료 시 자식 ffmpeg까지 한 번에 정리할 수 있도록 별도 프로세스 그룹으로 실행
+        start_new_session=os.name != "nt",
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    _stop_server(process)
+    raise RuntimeError("서버가 시작되지 않았습니다.")
+
+
+def _stop_server(process: subprocess.Popen) -> None:
+    """서버와 진행 중인 렌더링(ffmpeg 자식 프로세스 포함)을 함께 종료합니다."""
+    if os.name == "nt":
+        # Windows에는 프로세스 그룹 시그널이 없으므로 taskkill로 프로세스 트리를 종료
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)], capture_output=True)
+        process.wait()
+        return
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+def _writer(db_path: str, hold_seconds: float, stop) -> None:
+    """렌더링 진행 기록처럼 쓰기 트랜잭션을 잡았다 놓기를 반복합니다."""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    while not stop.is_set():
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("UPDATE projects SET title = title WHERE id = 1")
+        time.sleep(hold_seconds)
+        conn.execute("COMMIT")
+        time.sleep(0.05)
+    conn.close()
+
+
+def _setup_projects(base_url: str, workdir: str, count: int, source_seconds: int) -> list[int]:
+    source_path = os.path.join(workdir, "source.mp4")
+    _make_source(source_path, source_seconds)
+
+    project_ids = []
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        for i in range(count):
+            project_id = client.post("/projects", json={"title": f"bench {i}"}).json()["id"]
+            subtitles = [
+                {"start_time": j * 2.0, "end_time": j * 2.0 + 1.5, "text": f"자막 {j}"}
+                for j in range(SUBTITLES_PER_PROJECT)
+            ]
+            client.put(f"/projects/{project_id}/subtitles", json={"subtitles": subtitles})
+            project_ids.append(project_id)
+
+    # 다운로드 단계를 건너뛰고 합성 소스를 연결
+    conn = sqlite3.connect(os.path.join(workdir, "bench.db"))
+    conn.executemany(
+        "UPDATE projects SET source_path = ?, status = 'ready' WHERE id = ?",
+        [(source_path, project_id) for project_id in project_ids],
+    )
+    conn.commit()
+    conn.close()
+    return project_ids
+
+
+async def _load(base_url: str, project_ids: list[int], concurrency: int, seconds: float) -> dict:
+    paths = []
+    for project_id in project_ids:
+        paths += [
+            ("status", f"/projects/{project_id}/status"),
+            ("progress", f"/projects/{project_id}/render/progress"),
+            ("subtitles", f"/projects/{project_id}/subtitles"),
+            ("highlights", f"/projects/{project_id}/highlights"),
+        ]
+    paths.append(("list", "/projects"))
+
+    latencies: dict[str, list[float]] = {name: [] for name, _ in paths}
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(offset: int) -> None:
+        nonlocal errors
+        i = offset
+        while time.perf_counter() < deadline:
+            name, path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies[name].append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    def summary(values: list[float]) -> dict:
+        if not values:
+            return {"requests": 0}
+        ms = np.array(values) * 1000
+        return {
+            "requests": len(values),
+            "p50_ms": round(float(np.percentile(ms, 50)), 2),
+            "p95_ms": round(float(np.percentile(ms, 95)), 2),
+            "p99_ms": round(float(np.percentile(ms, 99)), 2),
+            "max_ms": round(float(ms.max()), 2),
+        }
+
+    all_values = [v for values in latencies.values() for v in values]
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests_per_s": round(len(all_values) / elapsed, 1),
+        "errors": errors,
+        "overall": summary(all_values),
+        "endpoints": {name: summary(values) for name, values in latencies.items()},
+    }
+
+
+def run(args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="alphacut_readbench_")
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = _start_server(workdir, port)
+    stop = multiprocessing.Event()
+    writers = []
+    try:
+        project_ids = _setup_projects(base_url, workdir, max(args.projects, args.renders), args.source_seconds)
+
+        for _ in range(args.writers):
+            process = multiprocessing.Process(
+                target=_writer, args=(os.path.join(workdir, "bench.db"), args.hold, stop)
+            )
+            process.start()
+            writers.append(process)
+
+        with httpx.Client(base_url=base_url, timeout=30) as client:
+            for project_id in project_ids[: args.renders]:
+                client.post(f"/projects/{project_id}/render", json={"include_subtitles": False})
+
+        result = asyncio.run(_load(base_url, project_ids, args.concurrency, args.seconds))
+    finally:
+        stop.set()
+        for process in writers:
+            process.join(timeout=10)
+        _stop_server(server)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "params": {
+            "concurrency": args.concurrency,
+            "seconds": args.seconds,
+            "renders": args.renders,
+            "writers": args.writers,
+            "hold_s": args.hold,
+            "projects": len(project_ids),
+        },
+        "result": result,
+    }
+
+    output_path = args.out
+    if output_path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output_path = os.path.join(RESULTS_DIR, f"read_{commit[:12]}.json")
+    with open(output_path, "w") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    _print_result(result)
+    print(f"결과 저장: {output_path}")
+    return report
+
+
+def _print_result(result: dict) -> None:
+    print(f"req/s {result['requests_per_s']}, errors {result['errors']}")
+    print(f"{'endpoint':<12} {'requests':>9} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}")
+    for name, s in [("overall", result["overall"])] + list(result["endpoints"].items()):
+        if not s["requests"]:
+            continue
+        print(f"{name:<12} {s['requests']:>9} {s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9}")
+
+
+def compare(old_path: str, new_path: str) -> None:
+    """두 결과 파일의 처리량과 p99 지연을 비교해 출력합니다."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"{old['commit'][:12]} → {new['commit'][:12]}")
+    print(f"req/s {old['result']['requests_per_s']} → {new['result']['requests_per_s']}")
+    print(f"{'endpoint':<12} {'old p99':>9} {'new p99':>9}")
+    rows = [("overall", old["result"]["overall"], new["result"]["overall"])]
+    rows += [
+        (name, old["result"]["endpoints"].get(name, {}), s) for name, s in new["result"]["endpoints"].items()
+    ]
+    for name, before, after in rows:
+        if "p99_ms" not in before or "p99_ms" not in after:
+            continue
+        print(f"{name:<12} {before['p99_ms']:>9} {after['p99_ms']:>9}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Alphacut 읽기 경로 부하 테스트")
+    parser.add_argument("--concurrency", type=int, default=64, help="동시 요청 수")
+    parser.add_argument("--seconds", type=float, default=20.0, help="측정 시간(초)")
+    parser.add_argument("--renders", type=int, default=2, help="동시에 실행할 렌더링 수")
+    parser.add_argument("--writers", type=int, default=0, help="쓰기 잠금을 잡는 보조 프로세스 수")
+    parser.add_argument("--hold", type=float, default=0.2, help="보조 프로세스의 쓰기 잠금 유지 시간(초)")
+    parser.add_argument("--projects", type=int, default=4, help="폴링 대상 프로젝트 수")
+    parser.add_argument("--source-seconds", type=int, default=60, help="합성 소스 길이(초)")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: benchmarks/results/read_<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="두 결과 파일 비교")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from dotenv import load_dotenv
 import os
@@ -7,12 +9,50 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./local.db")
 
+# 읽기 전용 엔드포인트용 비동기 드라이버 URL
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def _async_url(url: str) -> str:
+    scheme, rest = url.split("://", 1)
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False},
 )
 
+# aiosqlite 기본값(NullPool)은 요청마다 연결과 스레드를 새로 만들므로 풀을 명시합니다.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=8,
+    max_overflow=8,
+)
+
+
+def _configure_sqlite(dbapi_connection, _record) -> None:
+    """WAL 모드에서는 백그라운드 작업이 쓰기 잠금을 잡고 있어도 읽기가 막히지 않습니다."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _configure_sqlite)
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", _configure_sqlite)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
 
 
 class Base(DeclarativeBase):
@@ -25,3 +65,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,33 @@
+"""비동기 읽기 엔드포인트용 공통 의존성.
+
+상태/진행률 폴링처럼 자주 호출되는 읽기 요청은 이벤트 루프에서 비동기 세션으로
+처리해, 백그라운드 작업이 동기 스레드풀을 점유해도 지연되지 않도록 합니다.
+"""
+
+from typing import Optional
+
+import aiofiles.os
+from fastapi import Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_db
+from models import Project
+
+
+async def get_project(project_id: int, db: AsyncSession = Depends(get_async_db)) -> Project:
+    """경로의 project_id로 프로젝트를 조회하고 없으면 404를 반환합니다.
+
+    FastAPI가 요청 단위로 의존성 결과를 캐시하므로, 한 요청에서 여러 의존성이
+    이 함수를 참조해도 조회는 한 번만 실행됩니다.
+    """
+    project = await db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
+    return project
+
+
+async def path_exists(path: Optional[str]) -> bool:
+    """이벤트 루프를 막지 않고 파일 존재 여부를 확인합니다."""
+    if not path:
+        return False
+    return await aiofiles.os.path.exists(path)
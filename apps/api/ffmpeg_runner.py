@@ -0,0 +1,114 @@
+import re
+import json
+import time
+from typing import Optional
+
+import ffmpeg
+
+from jobs import current_job, JobCancelled
+from models import EncodeStat
+
+# ffmpeg 진행 상황 줄에서 key=value 쌍 추출 (예: "frame= 120 fps= 48 ... speed=1.6x")
+_PROGRESS_FIELD = re.compile(r"(\w+)=\s*(\S+)")
+_WARNING_LINE = re.compile(r"\b(warning|error|invalid|failed|discarding)\b", re.IGNORECASE)
+_MAX_WARNINGS = 20
+_LOG_TAIL_LINES = 15
+
+
+class FFmpegRunError(ffmpeg.Error):
+    """ffmpeg가 0이 아닌 코드로 종료된 경우. 수집된 통계를 함께 보관합니다."""
+
+    def __init__(self, stdout, stderr, stats: dict):
+        super().__init__("ffmpeg", stdout, stderr)
+        self.stats = stats
+
+
+def _parse_time(value: str) -> Optional[float]:
+    """"HH:MM:SS.ms" 형식을 초 단위로 변환합니다."""
+    if not value or value.startswith("-") or value == "N/A":
+        return None
+    try:
+        hours, minutes, seconds = value.split(":")
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except ValueError:
+        return None
+
+
+def _parse_number(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    match = re.match(r"[\d.]+", value)
+    return float(match.group()) if match else None
+
+
+def parse_stats(stderr: str) -> dict:
+    """ffmpeg stderr에서 마지막 진행 상황과 경고 줄을 추출합니다."""
+    lines = [line.strip() for line in re.split(r"[\r\n]+", stderr) if line.strip()]
+    progress_lines = [line for line in lines if "time=" in line and "speed=" in line]
+    other_lines = [line for line in lines if line not in progress_lines]
+
+    fields: dict[str, str] = {}
+    if progress_lines:
+        fields = dict(_PROGRESS_FIELD.findall(progress_lines[-1]))
+
+    frames = _parse_number(fields.get("frame"))
+    return {
+        "frames": int(frames) if frames is not None else None,
+        "fps": _parse_number(fields.get("fps")),
+        "speed": _parse_number(fields.get("speed")),
+        "bitrate_kbps": _parse_number(fields.get("bitrate")),
+        "out_time": _parse_time(fields.get("time", "")),
+        "warnings": [line for line in other_lines if _WARNING_LINE.search(line)][:_MAX_WARNINGS],
+        "log_tail": "\n".join(other_lines[-_LOG_TAIL_LINES:]),
+    }
+
+
+def run_ffmpeg(stream, kind: str) -> dict:
+    """ffmpeg-python 스트림을 실행하고 인코딩 통계를 반환합니다.
+
+    `.run(quiet=True)`와 달리 stderr를 파싱해 frames/fps/speed/bitrate를 수집합니다.
+    실패 시 통계를 담은 FFmpegRunError를, 현재 작업이 취소되어 종료된 경우
+    JobCancelled를 발생시킵니다.
+    """
+    job = current_job()
+    if job is not None:
+        job.check()
+    started = time.perf_counter()
+    process = stream.global_args("-nostdin").run_async(pipe_stdout=True, pipe_stderr=True)
+    if job is not None:
+        job.attach(process)
+    try:
+        stdout, stderr = process.communicate()
+    finally:
+        if job is not None:
+            job.detach(process)
+    stats = parse_stats(stderr.decode("utf-8", errors="replace"))
+    stats["kind"] = kind
+    stats["exit_code"] = process.returncode
+    stats["wall_seconds"] = time.perf_counter() - started
+
+    if job is not None and job.cancelled:
+        raise JobCancelled(f"{kind} 인코딩이 취소되었습니다.")
+    if process.returncode != 0:
+        raise FFmpegRunError(stdout, stderr, stats)
+    return stats
+
+
+def save_encode_stat(db, project_id: int, stats: dict, render_id: Optional[int] = None) -> None:
+    """수집한 통계를 EncodeStat 행으로 저장합니다 (commit은 호출자가 수행)."""
+    db.add(
+        EncodeStat(
+            project_id=project_id,
+            render_id=render_id,
+            kind=stats.get("kind", ""),
+            frames=stats.get("frames"),
+            fps=stats.get("fps"),
+            speed=stats.get("speed"),
+            bitrate_kbps=stats.get("bitrate_kbps"),
+            out_time=stats.get("out_time"),
+            wall_seconds=stats.get("wall_seconds"),
+            exit_code=stats.get("exit_code"),
+            warnings_json=json.dumps(stats.get("warnings") or [], ensure_ascii=False),
+            log_tail=stats.get("log_tail") if stats.get("exit_code") else None,
+        )
+    )
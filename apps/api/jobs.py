@@ -0,0 +1,228 @@
+"""백그라운드 작업 취소.
+
+다운로드/STT/렌더링 작업은 시작할 때 프로젝트별 `CancelToken`을 등록합니다.
+토큰은 contextvar로 현재 스레드에 연결되므로 `run_ffmpeg`, 스케줄러 대기,
+스트리밍 디코딩 등 하위 코드가 인자 변경 없이 취소 여부를 확인하고
+실행 중인 ffmpeg 프로세스를 등록할 수 있습니다.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from metrics import log_event, enter_background, current_route, JOB_CANCEL_SECONDS
+
+# 취소 API가 작업 정리 완료를 기다리는 최대 시간
+CANCEL_WAIT_SECONDS = 2.0
+
+
+class JobCancelled(Exception):
+    """작업이 사용자 요청으로 취소된 경우."""
+
+
+class CancelToken:
+    def __init__(self, project_id: int, kind: str):
+        self.project_id = project_id
+        self.kind = kind
+        self.started_at = time.monotonic()
+        self.cancel_requested_at: Optional[float] = None
+        self.finished = threading.Event()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._processes: set = set()
+        self._callbacks: list[Callable[[], None]] = []
+        self._context_token = None
+        self._route_token = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self) -> None:
+        """취소되었으면 JobCancelled를 발생시킵니다."""
+        if self._cancelled.is_set():
+            raise JobCancelled(f"{self.kind} 작업이 취소되었습니다.")
+
+    def attach(self, process) -> None:
+        """취소 시 종료할 서브프로세스를 등록합니다."""
+        with self._lock:
+            self._processes.add(process)
+            cancelled = self._cancelled.is_set()
+        if cancelled:
+            process.kill()
+
+    def detach(self, process) -> None:
+        with self._lock:
+            self._processes.discard(process)
+
+    def on_cancel(self, callback: Callable[[], None]) -> None:
+        """취소 시 호출할 콜백(HTTP 클라이언트 종료, 대기 깨우기 등)을 등록합니다."""
+        with self._lock:
+            self._callbacks.append(callback)
+            cancelled = self._cancelled.is_set()
+        if cancelled:
+            callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self.cancel_requested_at = time.monotonic()
+            self._cancelled.set()
+            processes = list(self._processes)
+            callbacks = list(self._callbacks)
+        for process in processes:
+            try:
+                process.kill()
+            except OSError:
+                pass
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def wait(self, fn: Callable, poll_seconds: float = 0.1):
+        """블로킹 호출(HTTP 요청 등)을 별도 스레드에서 실행하고, 취소되면 결과를 기다리지 않습니다."""
+        result: dict = {}
+        done = threading.Event()
+
+        def target():
+            try:
+                result["value"] = fn()
+            except BaseException as e:
+                result["error"] = e
+            finally:
+                done.set()
+
+        threading.Thread(target=target, daemon=True).start()
+        while not done.wait(poll_seconds):
+            self.check()
+        self.check()
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
+
+
+_current: ContextVar[Optional[CancelToken]] = ContextVar("current_job", default=None)
+
+
+def current_job() -> Optional[CancelToken]:
+    return _current.get()
+
+
+def check_cancelled() -> None:
+    """현재 작업이 취소되었으면 JobCancelled를 발생시킵니다 (작업 밖에서는 무시)."""
+    job = _current.get()
+    if job is not None:
+        job.check()
+
+
+class JobRegistry:
+    """프로젝트별 실행 중인 작업과 취소 토큰을 관리합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: dict[tuple[int, str], CancelToken] = {}
+
+    def submit(self, project_id: int, kind: str) -> CancelToken:
+        """작업을 큐에 넣을 때 토큰을 미리 등록해, 시작 전 취소도 가능하게 합니다."""
+        token = CancelToken(project_id, kind)
+        with self._lock:
+            self._jobs[(project_id, kind)] = token
+        return token
+
+    def claim(self, project_id: int, kind: str) -> Optional[CancelToken]:
+        """같은 작업이 대기/실행 중이 아니면 토큰을 등록해 반환하고, 이미 있으면 None을 반환합니다.
+
+        확인과 등록을 한 잠금 안에서 하므로 동시 요청이 같은 작업을 두 번 큐에 넣지 않습니다.
+        """
+        with self._lock:
+            token = self._jobs.get((project_id, kind))
+            if token is not None and not token.finished.is_set():
+                return None
+            token = CancelToken(project_id, kind)
+            self._jobs[(project_id, kind)] = token
+        return token
+
+    def begin(self, project_id: int, kind: str) -> CancelToken:
+        """작업 스레드에서 토큰을 가져와 현재 컨텍스트에 연결합니다. end와 짝을 이룹니다.
+
+        작업 중 DB 쿼리 지표가 "background" 라우트로 집계되도록 라우트 라벨도 바꿉니다.
+        """
+        with self._lock:
+            token = self._jobs.get((project_id, kind))
+            if token is None or token.finished.is_set():
+                token = CancelToken(project_id, kind)
+                self._jobs[(project_id, kind)] = token
+        token._context_token = _current.set(token)
+        token._route_token = enter_background()
+        return token
+
+    def end(self, token: CancelToken) -> None:
+        """작업 종료를 기록합니다. 여러 번 호출해도 안전합니다."""
+        if token.finished.is_set():
+            return
+        if token._context_token is not None:
+            _current.reset(token._context_token)
+            token._context_token = None
+        if token._route_token is not None:
+            current_route.reset(token._route_token)
+            token._route_token = None
+        with self._lock:
+            if self._jobs.get((token.project_id, token.kind)) is token:
+                del self._jobs[(token.project_id, token.kind)]
+        token.finished.set()
+        if token.cancel_requested_at is not None:
+            latency = time.monotonic() - token.cancel_requested_at
+            JOB_CANCEL_SECONDS.labels(kind=token.kind).observe(latency)
+            log_event("job_cancelled", token.project_id, kind=token.kind, latency=round(latency, 4))
+
+    def is_running(self, project_id: int, kind: str) -> bool:
+        """해당 작업이 대기 중이거나 실행 중이면 True."""
+        with self._lock:
+            token = self._jobs.get((project_id, kind))
+        return token is not None and not token.finished.is_set()
+
+    def cancel(self, project_id: int, kind: Optional[str] = None, wait_seconds: float = 0.0) -> list[dict]:
+        """작업을 취소하고, wait_seconds 동안 정리가 끝나기를 기다린 결과를 반환합니다."""
+        with self._lock:
+            tokens = [
+                t for (pid, k), t in self._jobs.items()
+                if pid == project_id and (kind is None or k == kind)
+            ]
+        for token in tokens:
+            token.cancel()
+
+        deadline = time.monotonic() + wait_seconds
+        results = []
+        for token in tokens:
+            stopped = token.finished.wait(max(0.0, deadline - time.monotonic()))
+            results.append({
+                "kind": token.kind,
+                "stopped": stopped,
+                "latency": round(time.monotonic() - token.cancel_requested_at, 4) if stopped else None,
+            })
+        return results
+
+    def active(self) -> list[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "project_id": t.project_id,
+                    "kind": t.kind,
+                    "elapsed": round(now - t.started_at, 3),
+                    "cancelled": t.cancelled,
+                }
+                for t in self._jobs.values()
+            ]
+
+
+job_registry = JobRegistry()
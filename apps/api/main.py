@@ -1,21 +1,58 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+import mimetypes
 import os
+import re
 
-from database import engine
+from database import engine, async_engine
 import models
+import metrics
+from media_cache import media_cache, MEDIA_SWEEP_SECONDS
+from search_index import init_search_index
+from revisions import init_revisions
 
-from routers import projects, ingest, ai, render
+from routers import projects, ingest, ai, render, analysis, search, system
 
 models.Base.metadata.create_all(bind=engine)
+init_search_index(engine)
+init_revisions(engine)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+
+
+async def _sweep_media():
+    """쓰기 경로에서 정리하지 않는 클래스(프록시 등)까지 주기적으로 용량 한도를 적용합니다."""
+    while True:
+        await asyncio.sleep(MEDIA_SWEEP_SECONDS)
+        try:
+            await asyncio.to_thread(media_cache.enforce_all)
+        except Exception as e:
+            print(f"[media] 용량 정리 오류: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 이전 프로세스가 중단되며 남긴 렌더링을 체크포인트부터 재개
+    render.resume_interrupted_renders()
+    sweeper = asyncio.create_task(_sweep_media()) if MEDIA_SWEEP_SECONDS > 0 else None
+    yield
+    if sweeper is not None:
+        sweeper.cancel()
+
 
 app = FastAPI(
     title="Alphacut API",
     description="숏폼 자동 제작 도구 - 로컬 FastAPI 백엔드",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+app.middleware("http")(metrics.http_middleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -27,14 +64,47 @@ app.add_middleware(
 MEDIA_BASE_PATH = os.getenv("MEDIA_BASE_PATH", "./media")
 outputs_path = os.path.join(MEDIA_BASE_PATH, "outputs")
 os.makedirs(outputs_path, exist_ok=True)
-app.mount("/media/outputs", StaticFiles(directory=outputs_path), name="outputs")
+
+# HLS 재생 목록/세그먼트 MIME 타입
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/iso.segment", ".m4s")
+
+# outputs/<project_id>/<내용 해시>/... 경로는 내용이 바뀌지 않음
+_IMMUTABLE_OUTPUT = re.compile(r"^\d+/[0-9a-f]{16}/")
+
+
+class OutputStaticFiles(StaticFiles):
+    """렌더링 결과 정적 파일. Range/ETag/304는 StaticFiles가 처리하고 캐시 헤더와 접근 시각만 갱신합니다."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        # 용량 한도 정리의 LRU 순서에 반영
+        media_cache.touch(full_path)
+        if _IMMUTABLE_OUTPUT.match(self.get_path(scope).replace(os.sep, "/")):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+
+app.mount("/media/outputs", OutputStaticFiles(directory=outputs_path), name="outputs")
 
 app.include_router(projects.router)
 app.include_router(ingest.router)
 app.include_router(ai.router)
 app.include_router(render.router)
+app.include_router(analysis.router)
+app.include_router(search.router)
+app.include_router(system.router)
 
 
 @app.get("/")
 def root():
     return {"message": "Alphacut API가 정상 동작 중입니다.", "docs": "/docs"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus 형식의 지표를 반환합니다."""
+    data, content_type = metrics.render_latest()
+    return Response(content=data, media_type=content_type)
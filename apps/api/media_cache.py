@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+from dotenv import load_dotenv
+
+from metrics import log_event, MEDIA_EVICTED_BYTES
+
+load_dotenv()
+
+MEDIA_BASE_PATH = os.getenv("MEDIA_BASE_PATH", "./media")
+# 주기적으로 모든 클래스의 용량 한도를 적용하는 간격(초). 0이면 끄기
+MEDIA_SWEEP_SECONDS = float(os.getenv("MEDIA_SWEEP_SECONDS") or 600)
+
+# 캐시 클래스 → media/ 하위 디렉터리
+MEDIA_CLASSES: dict[str, str] = {
+    "sources": "uploads",      # 다운로드된 원본 (source_url에서 재다운로드 가능)
+    "proxies": "proxies",      # 편집용 저해상도 프록시
+    "segments": "segments",    # 렌더링 중간 구간 파일
+    "outputs": "outputs",      # 렌더링 결과물
+    "analysis": "analysis",    # 오디오/영상 분석 캐시 (재계산 가능)
+}
+
+
+def _quota_bytes(media_class: str) -> int:
+    """MEDIA_QUOTA_<CLASS>_MB 환경 변수에서 용량 한도를 읽습니다. 0이면 무제한."""
+    value = os.getenv(f"MEDIA_QUOTA_{media_class.upper()}_MB")
+    return int(float(value) * 1024 * 1024) if value else 0
+
+
+class MediaCache:
+    """미디어 클래스별 용량 한도를 관리하고 LRU 순서로 파일을 정리합니다.
+
+    마지막 접근 시각은 파일 atime으로 기록하며(`touch`), 진행 중인 작업이
+    `pin`한 경로와 `protect`로 등록한 함수가 반환하는 경로(또는 그 하위 경로)는
+    정리 대상에서 제외됩니다.
+    """
+
+    def __init__(self, base_path: str = MEDIA_BASE_PATH):
+        self.base_path = base_path
+        self._lock = threading.Lock()
+        self._pins: dict[str, int] = {}
+        self._protectors: dict[str, list[Callable[[], Iterable[str]]]] = {}
+
+    def class_dir(self, media_class: str) -> str:
+        path = os.path.join(self.base_path, MEDIA_CLASSES[media_class])
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def url_for(self, path: str) -> Optional[str]:
+        """outputs 아래 파일의 공개 URL(/media/outputs/...)을 반환합니다. 파일시스템은 건드리지 않습니다."""
+        outputs_root = os.path.abspath(os.path.join(self.base_path, MEDIA_CLASSES["outputs"]))
+        path = os.path.abspath(path)
+        if not path.startswith(outputs_root + os.sep):
+            return None
+        return "/media/outputs/" + os.path.relpath(path, outputs_root).replace(os.sep, "/")
+
+    def touch(self, path: str) -> None:
+        """파일의 마지막 접근 시각을 현재로 갱신합니다 (mtime은 유지)."""
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except OSError:
+            pass
+
+    def acquire(self, *paths: str) -> None:
+        """주어진 파일/디렉터리를 release될 때까지 정리 대상에서 제외합니다."""
+        with self._lock:
+            for path in paths:
+                if path:
+                    key = os.path.abspath(path)
+                    self._pins[key] = self._pins.get(key, 0) + 1
+
+    def release(self, *paths: str) -> None:
+        with self._lock:
+            for path in paths:
+                if not path:
+                    continue
+                key = os.path.abspath(path)
+                if key in self._pins:
+                    self._pins[key] -= 1
+                    if self._pins[key] <= 0:
+                        del self._pins[key]
+
+    @contextmanager
+    def pin(self, *paths: str):
+        """블록이 끝날 때까지 주어진 파일/디렉터리를 정리 대상에서 제외합니다."""
+        self.acquire(*paths)
+        try:
+            yield
+        finally:
+            self.release(*paths)
+
+    def protect(self, media_class: str, provider: Callable[[], Iterable[str]]) -> None:
+        """provider가 반환하는 경로(또는 그 하위 경로)를 정리 대상에서 항상 제외합니다.
+
+        DB가 참조하는 게시된 결과물처럼 지우면 다시 받을 수 없는 파일에 사용합니다.
+        provider는 정리할 때마다 호출됩니다.
+        """
+        self._protectors.setdefault(media_class, []).append(provider)
+
+    def _protected(self, media_class: str) -> set[str]:
+        paths: set[str] = set()
+        for provider in self._protectors.get(media_class, []):
+            paths.update(os.path.abspath(path) for path in provider() if path)
+        return paths
+
+    @staticmethod
+    def _is_under(path: str, roots) -> bool:
+        path = os.path.abspath(path)
+        for root in roots:
+            if path == root or path.startswith(root + os.sep):
+                return True
+        return False
+
+    def _is_pinned(self, path: str) -> bool:
+        return self._is_under(path, self._pins)
+
+    def _entries(self, media_class: str) -> list[tuple[float, int, str]]:
+        """(마지막 접근 시각, 크기, 경로) 목록을 반환합니다."""
+        entries = []
+        for root, _, files in os.walk(self.class_dir(media_class)):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+        return entries
+
+    def _remove(self, path: str, media_class: str) -> None:
+        os.remove(path)
+        # 비어 있는 상위 디렉터리(프로젝트별 폴더 등)도 함께 정리
+        class_root = os.path.abspath(self.class_dir(media_class))
+        parent = os.path.dirname(os.path.abspath(path))
+        while parent.startswith(class_root + os.sep):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+
+    def enforce(self, media_class: str) -> list[str]:
+        """용량 한도를 넘으면 오래 접근하지 않은 파일부터 삭제합니다."""
+        quota = _quota_bytes(media_class)
+        if not quota:
+            return []
+
+        # provider가 DB를 조회할 수 있으므로 잠금 밖에서 호출
+        protected = self._protected(media_class)
+        with self._lock:
+            entries = sorted(self._entries(media_class))
+            used = sum(size for _, size, _ in entries)
+            evicted: list[str] = []
+            for _, size, path in entries:
+                if used <= quota:
+                    break
+                if self._is_pinned(path) or self._is_under(path, protected):
+                    continue
+                try:
+                    self._remove(path, media_class)
+                except OSError:
+                    continue
+                used -= size
+                evicted.append(path)
+                MEDIA_EVICTED_BYTES.labels(media_class=media_class).inc(size)
+                log_event("media_evict", media_class=media_class, path=path, bytes=size)
+        return evicted
+
+    def enforce_all(self) -> dict[str, list[str]]:
+        return {media_class: self.enforce(media_class) for media_class in MEDIA_CLASSES}
+
+    def report(self) -> dict:
+        """클래스별 사용량/한도/파일 수를 반환합니다."""
+        classes = {}
+        protected = {media_class: self._protected(media_class) for media_class in MEDIA_CLASSES}
+        with self._lock:
+            for media_class in MEDIA_CLASSES:
+                entries = self._entries(media_class)
+                used = sum(size for _, size, _ in entries)
+                quota = _quota_bytes(media_class)
+                classes[media_class] = {
+                    "path": self.class_dir(media_class),
+                    "files": len(entries),
+                    "used_bytes": used,
+                    "quota_bytes": quota or None,
+                    "utilisation": round(used / quota, 3) if quota else None,
+                    "pinned_files": sum(1 for _, _, path in entries if self._is_pinned(path)),
+                    "protected_files": sum(1 for _, _, path in entries if self._is_under(path, protected[media_class])),
+                }
+            pinned = sorted(self._pins)
+        return {"classes": classes, "pinned": pinned}
+
+
+media_cache = MediaCache()
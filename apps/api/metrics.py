@@ -0,0 +1,169 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from starlette.routing import Match
+
+# ── 구조화 로그 ──
+logger = logging.getLogger("alphacut")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def log_event(event: str, project_id: Optional[int] = None, **fields) -> None:
+    """project_id가 포함된 JSON 한 줄 로그를 남깁니다."""
+    record = {"ts": round(time.time(), 3), "event": event, "project_id": project_id, **fields}
+    logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+# ── Prometheus 지표 ──
+_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+_BYTES_BUCKETS = (1e6, 1e7, 5e7, 1e8, 2.5e8, 5e8, 1e9, 2.5e9, 5e9)
+_DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+STAGE_SECONDS = Histogram(
+    "alphacut_stage_seconds",
+    "파이프라인 단계별 소요 시간",
+    ["stage"],
+    buckets=_DURATION_BUCKETS,
+)
+DOWNLOAD_BYTES = Histogram(
+    "alphacut_download_bytes",
+    "다운로드된 원본 영상 크기",
+    buckets=_BYTES_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "alphacut_llm_tokens_total",
+    "LLM 호출에 사용된 토큰 수",
+    ["kind"],
+)
+ENCODE_FPS = Histogram(
+    "alphacut_encode_fps",
+    "인코딩 처리 속도 (frames/s)",
+    ["kind"],
+    buckets=(1, 5, 10, 20, 30, 45, 60, 90, 120, 240, 480),
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "alphacut_scheduler_queue_wait_seconds",
+    "인코더 스케줄러 대기 시간",
+    ["kind"],
+    buckets=_DURATION_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "alphacut_db_query_seconds",
+    "엔드포인트별 DB 쿼리 시간",
+    ["route"],
+    buckets=_DB_BUCKETS,
+)
+MEDIA_EVICTED_BYTES = Counter(
+    "alphacut_media_evicted_bytes_total",
+    "용량 한도 초과로 정리된 미디어 파일 크기",
+    ["media_class"],
+)
+JOB_CANCEL_SECONDS = Histogram(
+    "alphacut_job_cancel_seconds",
+    "취소 요청부터 작업 정리 완료까지 걸린 시간",
+    ["kind"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+RESPONSE_CACHE_REQUESTS = Counter(
+    "alphacut_response_cache_requests_total",
+    "리비전 기반 응답 캐시 결과 (hit/miss/not_modified)",
+    ["resource", "result"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "alphacut_http_request_seconds",
+    "HTTP 요청 처리 시간",
+    ["method", "route", "status"],
+    buckets=_DB_BUCKETS + (2.5, 5, 10),
+)
+
+# 현재 처리 중인 요청의 라우트 (백그라운드 작업은 "background")
+BACKGROUND_ROUTE = "background"
+current_route: ContextVar[str] = ContextVar("current_route", default=BACKGROUND_ROUTE)
+
+
+def enter_background():
+    """현재 컨텍스트의 라우트 라벨을 "background"로 바꾸고 reset용 토큰을 반환합니다.
+
+    BackgroundTasks는 요청 컨텍스트를 복사해 실행되므로, 그대로 두면 작업의 DB 쿼리가
+    작업을 시작한 요청의 라우트로 집계됩니다.
+    """
+    return current_route.set(BACKGROUND_ROUTE)
+
+
+@contextmanager
+def timed(stage: str, project_id: Optional[int] = None, **fields):
+    """블록 실행 시간을 단계 히스토그램과 구조화 로그에 기록합니다.
+
+    yield되는 dict에 값을 넣으면 로그 필드로 함께 남습니다.
+    """
+    extra: dict = {}
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield extra
+        ok = True
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+        log_event(stage, project_id, seconds=round(seconds, 4), ok=ok, **fields, **extra)
+
+
+def observe_encode(kind: str, seconds: float, frames: float) -> None:
+    """인코딩 fps를 기록합니다."""
+    if seconds > 0 and frames > 0:
+        ENCODE_FPS.labels(kind=kind).observe(frames / seconds)
+
+
+def instrument_engine(engine) -> None:
+    """SQLAlchemy 엔진에 쿼리 시간 측정 리스너를 등록합니다."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if starts:
+            DB_QUERY_SECONDS.labels(route=current_route.get()).observe(time.perf_counter() - starts.pop())
+
+
+def _route_template(request) -> str:
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", request.url.path)
+    return "unmatched"
+
+
+async def http_middleware(request, call_next):
+    """요청별 라우트 라벨을 설정하고 처리 시간을 기록합니다."""
+    route = _route_template(request)
+    token = current_route.set(route)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method, route=route, status=str(status)
+        ).observe(time.perf_counter() - start)
+        current_route.reset(token)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Prometheus 텍스트 포맷의 지표와 Content-Type을 반환합니다."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -19,13 +19,15 @@ class Project(Base):
     subtitles = relationship("Subtitle", back_populates="project", cascade="all, delete-orphan")
     templates = relationship("Template", back_populates="project", cascade="all, delete-orphan")
     highlights = relationship("Highlight", back_populates="project", cascade="all, delete-orphan")
+    renders = relationship("RenderJob", back_populates="project", cascade="all, delete-orphan")
+    encode_stats = relationship("EncodeStat", back_populates="project", cascade="all, delete-orphan")
 
 
 class Subtitle(Base):
     __tablename__ = "subtitles"
 
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
     start_time = Column(Float, nullable=False)
     end_time = Column(Float, nullable=False)
     text = Column(Text, nullable=False)
@@ -58,3 +60,41 @@ class Highlight(Base):
     order = Column(Integer, default=0)
 
     project = relationship("Project", back_populates="highlights")
+
+
+class RenderJob(Base):
+    __tablename__ = "render_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    # rendering/done/error/cancelled
+    status = Column(String, default="rendering")
+    highlight_ids_json = Column(Text, nullable=True)  # JSON: [highlight_id, ...]
+    output_path = Column(String, nullable=True)
+    started_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime, nullable=True)
+
+    project = relationship("Project", back_populates="renders")
+    encode_stats = relationship("EncodeStat", back_populates="render", cascade="all, delete-orphan")
+
+
+class EncodeStat(Base):
+    __tablename__ = "encode_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    render_id = Column(Integer, ForeignKey("render_jobs.id"), nullable=True, index=True)
+    kind = Column(String, nullable=False)  # audio/segment/full/concat/hls/reframe
+    frames = Column(Integer, nullable=True)
+    fps = Column(Float, nullable=True)
+    speed = Column(Float, nullable=True)  # 실시간 대비 배속
+    bitrate_kbps = Column(Float, nullable=True)
+    out_time = Column(Float, nullable=True)  # 출력 길이(초)
+    wall_seconds = Column(Float, nullable=True)
+    exit_code = Column(Integer, nullable=True)
+    warnings_json = Column(Text, nullable=True)  # JSON: [경고 줄, ...]
+    log_tail = Column(Text, nullable=True)  # 실패 시 stderr 마지막 줄들
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    project = relationship("Project", back_populates="encode_stats")
+    render = relationship("RenderJob", back_populates="encode_stats")
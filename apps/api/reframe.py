@@ -0,0 +1,371 @@
+"""움직임/얼굴 위치를 따라가는 9:16 스마트 크롭 경로.
+
+원본을 ffmpeg로 낮은 fps(SAMPLE_FPS), 160x90 YUV444로 디코딩해 파이프로 받고,
+프레임 묶음 단위로 NumPy에서 열(column)별 주목도를 계산합니다.
+
+    주목도 = 움직임(이전 샘플과의 휘도 차) + 피부색(YCbCr 범위, 화면 위쪽 가중) + 윤곽(수평 기울기)
+
+프레임마다 크롭 창 폭만큼의 누적합이 가장 큰 위치를 중심으로 잡고, 장면 전환 단위로
+중앙값 필터 → 가우시안 평활 → 이동 속도 제한을 적용해 흔들림 없는 경로를 만듭니다.
+경로는 원본 기준 정규화 중심 좌표(0~1)로 analysis/<id>/reframe.json에 캐시하며,
+렌더링 시 구간별 sendcmd 파일로 crop 필터의 x 식을 시간에 따라 바꿉니다.
+캐시가 없을 때 하이라이트만 렌더링하면 해당 구간만 분석하고 캐시하지 않습니다.
+"""
+
+import os
+import json
+import time
+from typing import Optional
+
+import numpy as np
+
+from analysis_cache import analysis_path, source_key
+from media_cache import media_cache
+from metrics import timed
+from scheduler import encode_scheduler
+from jobs import current_job
+
+SAMPLE_FPS = 4
+SAMPLE_WIDTH = 160
+SAMPLE_HEIGHT = 90
+BATCH_FRAMES = 64
+TARGET_ASPECT = 9 / 16
+
+MOTION_NOISE = 6.0  # 압축 노이즈로 보는 휘도 차
+SCENE_CUT_DIFF = 40.0  # 샘플 간 평균 휘도 차가 이보다 크면 장면 전환
+MIN_CONFIDENCE = 0.15  # 최고 창 점수가 평균보다 이 비율 이상 높아야 위치를 갱신
+SMOOTH_SECONDS = 0.75  # 가우시안 평활 표준편차
+MAX_PAN_PER_SECOND = 0.35  # 초당 최대 이동량 (원본 폭 대비)
+PATH_TOLERANCE = 0.002  # sendcmd 명령을 합칠 때 허용하는 위치 오차 (원본 폭 대비)
+WEIGHTS = {"motion": 0.5, "skin": 0.35, "edges": 0.15}
+# 이 비율 이상의 화면에 나타나야 신호가 가중치만큼 반영됨
+MIN_COVERAGE = {"motion": 0.01, "skin": 0.02}
+
+REFRAME_VERSION = 1
+
+_FRAME_BYTES = SAMPLE_WIDTH * SAMPLE_HEIGHT * 3
+# 얼굴은 화면 위쪽에 있는 경우가 많으므로 피부색 화소에 행별 가중치를 줍니다.
+_SKIN_ROW_WEIGHTS = np.linspace(1.0, 0.3, SAMPLE_HEIGHT, dtype=np.float32)[None, :, None]
+
+
+def reframe_path(project_id: int) -> str:
+    return analysis_path(project_id, "reframe.json")
+
+
+def _probe_size(source_path: str) -> tuple[int, int]:
+    """ffprobe로 영상 크기를 구합니다. 실패하면 16:9로 가정합니다."""
+    import ffmpeg
+
+    try:
+        stream = next(s for s in ffmpeg.probe(source_path)["streams"] if s["codec_type"] == "video")
+        return int(stream["width"]), int(stream["height"])
+    except Exception:
+        return 1920, 1080
+
+
+def _column_saliency(frames: np.ndarray, prev_luma: Optional[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """(n, 3, H, W) YUV 프레임에서 열별 주목도 (n, W)와 샘플 간 평균 휘도 차 (n,)를 구합니다."""
+    luma = frames[:, 0].astype(np.float32)
+    cb = frames[:, 1]
+    cr = frames[:, 2]
+
+    prev = np.concatenate([luma[:1] if prev_luma is None else prev_luma[None], luma[:-1]])
+    diff = np.abs(luma - prev)
+    cut_score = diff.mean(axis=(1, 2))
+
+    moving = np.maximum(diff - MOTION_NOISE, 0.0)
+    skin = ((cb >= 77) & (cb <= 127) & (cr >= 133) & (cr <= 173))
+    signals = {
+        "motion": (moving.sum(axis=1), (moving > 0).mean(axis=(1, 2))),
+        "skin": ((skin * _SKIN_ROW_WEIGHTS).sum(axis=1), skin.mean(axis=(1, 2))),
+        "edges": (np.pad(np.abs(np.diff(luma, axis=2)), ((0, 0), (0, 0), (0, 1))).sum(axis=1), None),
+    }
+
+    saliency = np.zeros((frames.shape[0], SAMPLE_WIDTH), dtype=np.float32)
+    for name, (signal, coverage) in signals.items():
+        # 신호마다 프레임 내 분포로 정규화해 가중합 (신호가 없는 프레임은 기여하지 않음)
+        total = signal.sum(axis=1, keepdims=True)
+        weight = np.full((frames.shape[0], 1), WEIGHTS[name], dtype=np.float32)
+        if coverage is not None:
+            # 화면의 극히 일부에만 나타난 신호(노이즈, 작은 피부색 영역)는 비중을 줄임
+            weight *= np.clip(coverage / MIN_COVERAGE[name], 0.0, 1.0)[:, None]
+        saliency += weight * np.divide(signal, total, out=np.zeros_like(signal, dtype=np.float32), where=total > 1e-6)
+    return saliency, cut_score
+
+
+def _window_centers(saliency: np.ndarray, window: int) -> np.ndarray:
+    """크롭 창 합이 최대인 위치에서 창 안 주목도의 무게중심을 구합니다. 확신이 낮은 프레임은 NaN.
+
+    창보다 좁은 대상은 창 합이 같은 위치가 여러 개이고 argmax는 그중 가장 왼쪽을 고르므로,
+    창의 중앙 대신 창 안 무게중심을 써야 대상이 크롭 가장자리가 아닌 가운데에 옵니다.
+    """
+    cumulative = np.concatenate([np.zeros((saliency.shape[0], 1), dtype=np.float32), saliency.cumsum(axis=1)], axis=1)
+    scores = cumulative[:, window:] - cumulative[:, :-window]
+    best = scores.argmax(axis=1)
+    peak = scores.max(axis=1)
+    mean = scores.mean(axis=1)
+    confidence = np.divide(peak - mean, peak, out=np.zeros_like(peak), where=peak > 1e-6)
+
+    columns = best[:, None] + np.arange(window)
+    inside = np.take_along_axis(saliency, columns, axis=1)
+    mass = inside.sum(axis=1)
+    centroid = np.divide((inside * (columns + 0.5)).sum(axis=1), mass, out=best + window / 2, where=mass > 1e-6)
+    centers = centroid / SAMPLE_WIDTH
+    centers[confidence < MIN_CONFIDENCE] = np.nan
+    return centers
+
+
+def _fill_gaps(values: np.ndarray) -> np.ndarray:
+    """NaN을 직전 값으로 채우고, 앞쪽 NaN은 첫 값(없으면 중앙)으로 채웁니다."""
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return np.full_like(values, 0.5)
+    index = np.where(valid, np.arange(values.size), 0)
+    np.maximum.accumulate(index, out=index)
+    filled = values[index]
+    filled[: np.argmax(valid)] = values[np.argmax(valid)]
+    return filled
+
+
+def _smooth_shot(values: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    values = _fill_gaps(values)
+    if values.size < 3:
+        return np.clip(values, lo, hi)
+
+    # 중앙값 필터로 순간적인 튐 제거
+    padded = np.pad(values, 2, mode="edge")
+    values = np.median(np.lib.stride_tricks.sliding_window_view(padded, 5), axis=1)
+
+    # 가우시안 평활 (장면 경계 밖 값은 쓰지 않도록 가장자리 반사)
+    sigma = SMOOTH_SECONDS * SAMPLE_FPS
+    radius = int(3 * sigma)
+    kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma) ** 2)
+    kernel /= kernel.sum()
+    padded = np.pad(values, radius, mode="reflect" if values.size > radius else "edge")
+    values = np.convolve(padded, kernel, mode="valid")
+
+    # 이동 속도 제한
+    step = MAX_PAN_PER_SECOND / SAMPLE_FPS
+    values = values[0] + np.concatenate([[0.0], np.clip(np.diff(values), -step, step).cumsum()])
+    return np.clip(values, lo, hi)
+
+
+def _smooth_path(centers: np.ndarray, cuts: np.ndarray, window_ratio: float) -> np.ndarray:
+    lo, hi = window_ratio / 2, 1 - window_ratio / 2
+    bounds = [0, *cuts.tolist(), centers.size]
+    smoothed = np.empty_like(centers)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end > start:
+            smoothed[start:end] = _smooth_shot(centers[start:end], lo, hi)
+    return smoothed
+
+
+def _analyze_span(
+    source_path: str, start: float, duration: Optional[float], window: int, threads: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """[start, start+duration) 구간을 축소 디코딩해 샘플별 창 중심과 장면 전환 점수를 구합니다.
+
+    start는 샘플 격자(1/SAMPLE_FPS) 위에 있어야 샘플 시각이 전체 분석과 맞습니다.
+    duration이 None이면 끝까지 분석합니다.
+    """
+    import ffmpeg
+
+    input_args = {"ss": start} if start > 0 else {}
+    if duration is not None:
+        input_args["t"] = duration
+
+    center_chunks: list[np.ndarray] = []
+    cut_chunks: list[np.ndarray] = []
+    prev_luma: Optional[np.ndarray] = None
+    process = (
+        ffmpeg
+        .input(source_path, **input_args)
+        .video
+        .filter("fps", SAMPLE_FPS)
+        .filter("scale", SAMPLE_WIDTH, SAMPLE_HEIGHT, flags="fast_bilinear")
+        .output("pipe:", format="rawvideo", pix_fmt="yuv444p")
+        .global_args("-nostdin", "-loglevel", "error", "-threads", str(threads))
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+    job = current_job()
+    if job is not None:
+        job.attach(process)
+
+    while True:
+        data = process.stdout.read(_FRAME_BYTES * BATCH_FRAMES)
+        usable = len(data) - len(data) % _FRAME_BYTES
+        if not usable:
+            break
+        frames = np.frombuffer(data[:usable], dtype=np.uint8).reshape(-1, 3, SAMPLE_HEIGHT, SAMPLE_WIDTH)
+        saliency, cut_score = _column_saliency(frames, prev_luma)
+        center_chunks.append(_window_centers(saliency, window))
+        cut_chunks.append(cut_score)
+        prev_luma = frames[-1, 0].astype(np.float32)
+
+    stderr = process.stderr.read()
+    process.wait()
+    if job is not None:
+        job.detach(process)
+        job.check()
+    if process.returncode != 0:
+        raise RuntimeError(f"리프레이밍 분석 실패: {stderr.decode('utf-8', errors='replace')[-300:]}")
+
+    centers = np.concatenate(center_chunks) if center_chunks else np.zeros(0)
+    cut_scores = np.concatenate(cut_chunks) if cut_chunks else np.zeros(0)
+    return centers, cut_scores
+
+
+def analyze_reframe(
+    project_id: int, source_path: str, ranges: Optional[list[tuple[float, float]]] = None
+) -> dict:
+    """원본을 축소 디코딩해 스마트 크롭 경로를 계산합니다.
+
+    ranges((시작, 길이) 목록)를 주면 그 구간만 분석하고, 구간 밖은 중앙으로 채운 경로를
+    캐시하지 않고 반환합니다 (짧은 하이라이트 렌더링이 원본 전체를 디코딩하지 않도록).
+    ranges가 없으면 원본 전체를 분석해 캐시합니다.
+    반환값의 "cost"는 EncodeStat으로 저장할 수 있는 통계 형식입니다.
+    """
+    width, height = _probe_size(source_path)
+    window_ratio = min(1.0, height * TARGET_ASPECT / width)
+    window = max(1, round(window_ratio * SAMPLE_WIDTH))
+    started = time.perf_counter()
+
+    with encode_scheduler.slot("draft", label=source_path) as threads:
+        with timed("reframe_analysis", project_id, ranges=len(ranges) if ranges else None) as stage_info:
+            if ranges is None:
+                centers, cut_scores = _analyze_span(source_path, 0.0, None, window, threads)
+                cuts = np.flatnonzero(cut_scores > SCENE_CUT_DIFF)
+                cuts = cuts[cuts > 0]
+                path = _smooth_path(centers, cuts, window_ratio) if centers.size else centers
+                samples = centers.size
+            else:
+                # 구간마다 샘플 격자에 맞춰 디코딩하고, 전체 분석과 같은 샘플 위치에 채웁니다.
+                spans = []
+                for start, duration in sorted(ranges):
+                    first = int(start * SAMPLE_FPS)
+                    # 끝 샘플 다음 샘플까지 있어야 crop_commands가 구간 끝의 기울기를 계산할 수 있음
+                    last = int(np.ceil((start + duration) * SAMPLE_FPS)) + 1
+                    # 한 샘플 앞부터 디코딩해 첫 샘플도 움직임(이전 샘플과의 차)을 계산하고 버립니다.
+                    lead = 1 if first > 0 else 0
+                    centers, cut_scores = _analyze_span(
+                        source_path, (first - lead) / SAMPLE_FPS, (last - first + lead + 1) / SAMPLE_FPS, window, threads
+                    )
+                    spans.append((first, centers[lead:], cut_scores[lead:]))
+                size = max((first + centers.size for first, centers, _ in spans), default=0)
+                path = np.full(size, 0.5)
+                cut_list: list[int] = []
+                for first, centers, cut_scores in spans:
+                    if not centers.size:
+                        continue
+                    span_cuts = np.flatnonzero(cut_scores > SCENE_CUT_DIFF)
+                    span_cuts = span_cuts[span_cuts > 0]
+                    path[first:first + centers.size] = _smooth_path(centers, span_cuts, window_ratio)
+                    # 분석하지 않은 틈을 건너 보간하지 않도록 구간 시작도 장면 전환으로 표시
+                    cut_list += ([first] if first > 0 else []) + (first + span_cuts).tolist()
+                cuts = np.unique(np.asarray(cut_list, dtype=np.int64))
+                samples = sum(centers.size for _, centers, _ in spans)
+
+            wall_seconds = time.perf_counter() - started
+            duration = samples / SAMPLE_FPS
+            cost = {
+                "kind": "reframe",
+                "frames": int(samples),
+                "fps": round(samples / wall_seconds, 2) if wall_seconds else None,
+                "speed": round(duration / wall_seconds, 2) if wall_seconds else None,
+                "out_time": duration,
+                "wall_seconds": round(wall_seconds, 4),
+                "exit_code": 0,
+            }
+            result = {
+                "version": REFRAME_VERSION,
+                "source_key": source_key(source_path),
+                "fps": SAMPLE_FPS,
+                "window_ratio": round(window_ratio, 5),
+                "centers": np.round(path, 4).tolist(),
+                "cuts": cuts.tolist(),
+                "cost": cost,
+            }
+            if ranges is None:
+                tmp_path = analysis_path(project_id, "reframe.json.tmp", create=True)
+                with open(tmp_path, "w") as f:
+                    json.dump(result, f)
+                os.replace(tmp_path, reframe_path(project_id))
+                media_cache.enforce("analysis")
+
+            stage_info.update(samples=cost["frames"], cuts=len(cuts), speed=cost["speed"])
+
+    return result
+
+
+def load_reframe(project_id: int, source_path: Optional[str] = None) -> Optional[dict]:
+    """캐시된 크롭 경로를 반환합니다. source_path를 주면 원본이 바뀐 캐시는 무시합니다."""
+    path = reframe_path(project_id)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        result = json.load(f)
+    if result.get("version") != REFRAME_VERSION:
+        return None
+    if source_path and result.get("source_key") != source_key(source_path):
+        return None
+    return result
+
+
+def _x_expr(center: float, slope: float, t0: float) -> str:
+    """정규화 중심 궤적을 crop x 식으로 변환합니다 (원본 범위 밖으로 나가지 않게 clip)."""
+    if abs(slope) < 1e-6:
+        center_expr = f"{center:.4f}"
+    else:
+        center_expr = f"({center:.4f}+(t{-t0:+.3f})*{slope:.5f})"
+    return f"clip({center_expr}*iw-ow/2,0,iw-ow)"
+
+
+def crop_commands(reframe: dict, start: float, duration: Optional[float]) -> list[tuple[float, str]]:
+    """구간 [start, start+duration)의 (구간 기준 시각, crop x 식) 목록을 만듭니다.
+
+    샘플 사이는 선형 보간하고 장면 전환에서는 바로 이동합니다. 현재 직선으로
+    다음 샘플을 PATH_TOLERANCE 이내로 예측할 수 있으면 명령을 새로 만들지 않습니다.
+    """
+    centers = np.asarray(reframe["centers"], dtype=np.float64)
+    fps = reframe["fps"]
+    if centers.size == 0:
+        return [(0.0, _x_expr(0.5, 0.0, 0.0))]
+
+    first = min(int(start * fps), centers.size - 1)
+    last = centers.size - 1 if duration is None else min(int(np.ceil((start + duration) * fps)), centers.size - 1)
+    cuts = set(reframe["cuts"])
+
+    commands: list[tuple[float, str]] = []
+    run_center = run_slope = run_t0 = None
+    for i in range(first, max(last, first + 1)):
+        t0 = i / fps - start
+        if i + 1 < centers.size and i + 1 not in cuts:
+            slope = (centers[i + 1] - centers[i]) * fps
+        else:
+            # 다음 샘플이 새 장면의 시작이면 머물렀다가 장면 전환에서 바로 이동
+            slope = 0.0
+        if run_center is not None and i not in cuts:
+            predicted = run_center + (t0 - run_t0) * run_slope
+            next_predicted = predicted + slope / fps
+            next_expected = run_center + (t0 + 1 / fps - run_t0) * run_slope
+            if abs(predicted - centers[i]) <= PATH_TOLERANCE and abs(next_predicted - next_expected) <= PATH_TOLERANCE:
+                continue
+        run_center, run_slope, run_t0 = float(centers[i]), float(slope), t0
+        commands.append((max(0.0, t0), _x_expr(run_center, run_slope, t0)))
+
+    # 구간 시작 이전에 시작한 명령은 마지막 것만 0초에 적용
+    leading = [c for c in commands if c[0] <= 0.0]
+    return leading[-1:] + [c for c in commands if c[0] > 0.0]
+
+
+def crop_filter(reframe: Optional[dict], start: float, duration: Optional[float], command_path: str) -> str:
+    """9:16 crop 필터 문자열을 만듭니다. reframe이 없으면 기존 중앙 크롭을 사용합니다."""
+    if reframe is None:
+        return "crop=ih*9/16:ih"
+
+    commands = crop_commands(reframe, start, duration)
+    with open(command_path, "w") as f:
+        for t, expr in commands:
+            f.write(f"{t:.3f} crop x '{expr}';\n")
+    escaped_path = command_path.replace("\\", "/").replace("'", "\\'").replace(":", "\\:")
+    return f"sendcmd=f='{escaped_path}',crop=w=ih*9/16:h=ih:x='{commands[0][1]}'"
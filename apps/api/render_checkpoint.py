@@ -0,0 +1,317 @@
+"""재개 가능한 렌더링을 위한 구간 체크포인트.
+
+렌더링마다 media/segments/<project_id>/render_<render_id>/ 작업 디렉터리를 두고,
+계획된 청크 목록과 완료 여부를 manifest.json에 기록합니다. 하이라이트 렌더링은
+하이라이트 구간마다 한 청크입니다. 전체 영상 렌더링은 RENDER_CHUNK_SECONDS 안팎의
+시간 청크로 나누되, 경계를 원본 키프레임에 맞추고 청크는 영상만 인코딩합니다. 오디오는
+연결할 때 원본에서 한 번에 인코딩해 붙이므로 이음매에 AAC 프라이밍 간격이 생기지 않습니다.
+프로세스가 중간에 종료되어도 완료된 청크 파일과 매니페스트가 남으므로, 재시작 후 같은
+렌더링을 마지막 완료 청크 다음부터 이어서 인코딩할 수 있습니다.
+
+작업 디렉터리의 render.lock은 렌더링 중인 프로세스가 OS 파일 잠금으로 쥐고 있으므로,
+여러 서버 프로세스가 떠 있어도 살아 있는 렌더링을 다른 프로세스가 재개하거나 지우지 않습니다.
+프로세스가 죽으면 잠금은 OS가 풀어 줍니다.
+
+manifest.json 예시:
+    {
+      "version": 2,
+      "render_id": 12,
+      "source_size": 104857600,
+      "hls": false,
+      "smart_crop": true,
+      "previous_status": "ready",
+      "subtitles": [{"start_time": 1.0, "end_time": 2.5, "text": "...", "style_json": null}],
+      "chunks": [{"index": 0, "start": 0.0, "duration": 120.12, "kind": "full",
+                  "file": "chunk_000.mp4", "done": true,
+                  "streams": {"video": 120.12, "audio": null}},
+                 {"index": 1, "start": 120.1195, "duration": null, "kind": "full",
+                  "file": "chunk_001.mp4", "done": false}]
+    }
+"""
+
+import os
+import json
+import shutil
+from types import SimpleNamespace
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from dotenv import load_dotenv
+
+from media_cache import media_cache
+
+load_dotenv()
+
+# 전체 영상 렌더링의 청크 길이(초). 프로세스가 죽으면 최대 이만큼(+키프레임 간격)만 다시 인코딩합니다.
+RENDER_CHUNK_SECONDS = float(os.getenv("RENDER_CHUNK_SECONDS") or 120)
+
+# 청크 경계를 키프레임보다 이만큼 앞에서 잘라 반올림 오차로 키프레임이 앞 청크에 들어가지 않게 합니다.
+_BOUNDARY_LEAD = 0.0005
+
+# 2: 전체 영상 청크는 영상만 담고 오디오는 연결할 때 붙임
+MANIFEST_VERSION = 2
+_MANIFEST = "manifest.json"
+_LOCK = "render.lock"
+
+
+def job_dir(project_id: int, render_id: int) -> str:
+    return os.path.join(media_cache.class_dir("segments"), str(project_id), f"render_{render_id}")
+
+
+def plan_time_chunks(
+    duration: Optional[float], keyframes: list[float], chunk_seconds: float = RENDER_CHUNK_SECONDS
+) -> list[tuple[float, Optional[float]]]:
+    """전체 영상을 chunk_seconds 안팎의 (시작, 길이) 구간으로 나눕니다.
+
+    경계는 목표 시각 이후의 첫 키프레임에 맞추고(키프레임 목록이 없으면 목표 시각 그대로),
+    마지막 구간은 길이를 None으로 두어 끝까지 인코딩합니다. 길이를 모르면 한 구간입니다.
+    """
+    if not duration or duration <= chunk_seconds:
+        return [(0.0, None)]
+
+    keyframes = sorted(keyframes)
+    boundaries = [0.0]
+    target = chunk_seconds
+    while True:
+        boundary = next((k for k in keyframes if k >= target), None) if keyframes else target
+        # 너무 짧은 마지막 조각은 앞 청크에 합칩니다.
+        if boundary is None or boundary >= duration - 1.0:
+            break
+        boundaries.append(boundary)
+        target = boundary + chunk_seconds
+
+    ranges: list[tuple[float, Optional[float]]] = []
+    for i, boundary in enumerate(boundaries):
+        start = max(0.0, boundary - _BOUNDARY_LEAD) if boundary > 0 else 0.0
+        length = boundaries[i + 1] - boundary if i + 1 < len(boundaries) else None
+        if length is not None and boundary == 0:
+            length -= _BOUNDARY_LEAD
+        ranges.append((start, length))
+    return ranges
+
+
+def plan_chunks(ranges: list[tuple[float, Optional[float]]], kind: str) -> list[dict]:
+    """(시작, 길이) 구간마다 한 청크를 만듭니다. 길이가 None이면 시작부터 끝까지 인코딩합니다."""
+    return [
+        {
+            "index": index,
+            "start": round(start, 6),
+            "duration": round(duration, 6) if duration is not None else None,
+            "kind": kind,
+            "file": f"chunk_{index:03d}.mp4",
+            "done": False,
+        }
+        for index, (start, duration) in enumerate(ranges)
+    ]
+
+
+class JobLock:
+    """작업 디렉터리의 render.lock에 대한 프로세스 간 배타 잠금 (비차단)."""
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, _LOCK)
+        self._file = None
+
+    def acquire(self) -> bool:
+        """잠금을 얻으면 True, 다른 프로세스가 쥐고 있으면 False를 반환합니다."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+        self._file.close()
+        self._file = None
+
+
+def is_locked(directory: str) -> bool:
+    """다른 프로세스(또는 이 프로세스의 렌더링)가 작업 디렉터리를 쓰고 있는지 확인합니다."""
+    if not os.path.exists(os.path.join(directory, _LOCK)):
+        return False
+    lock = JobLock(directory)
+    if lock.acquire():
+        lock.release()
+        return False
+    return True
+
+
+def subtitles_to_dicts(subtitles: list) -> list[dict]:
+    return [
+        {
+            "start_time": s.start_time,
+            "end_time": s.end_time,
+            "text": s.text,
+            "style_json": s.style_json,
+        }
+        for s in subtitles
+    ]
+
+
+def subtitles_from_dicts(items: list[dict]) -> list:
+    """매니페스트의 자막을 drawtext 필터 생성에 쓸 수 있는 객체로 되돌립니다."""
+    return [SimpleNamespace(**item) for item in items]
+
+
+class RenderManifest:
+    """작업 디렉터리의 manifest.json을 읽고 원자적으로 갱신합니다."""
+
+    def __init__(self, path: str, data: dict):
+        self.path = path
+        self.data = data
+
+    @property
+    def directory(self) -> str:
+        return os.path.dirname(self.path)
+
+    @property
+    def chunks(self) -> list[dict]:
+        return self.data["chunks"]
+
+    @property
+    def video_only(self) -> bool:
+        """전체 영상 렌더링의 청크는 영상만 담고, 오디오는 연결할 때 원본에서 한 번에 붙입니다."""
+        return all(chunk["kind"] == "full" for chunk in self.chunks)
+
+    @classmethod
+    def create(
+        cls,
+        directory: str,
+        render_id: int,
+        source_path: str,
+        chunks: list[dict],
+        subtitles: list,
+        hls: bool,
+        smart_crop: bool,
+        previous_status: Optional[str],
+    ) -> "RenderManifest":
+        os.makedirs(directory, exist_ok=True)
+        manifest = cls(
+            os.path.join(directory, _MANIFEST),
+            {
+                "version": MANIFEST_VERSION,
+                "render_id": render_id,
+                "source_size": os.path.getsize(source_path),
+                "hls": hls,
+                "smart_crop": smart_crop,
+                "previous_status": previous_status,
+                "subtitles": subtitles_to_dicts(subtitles),
+                "chunks": chunks,
+            },
+        )
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, directory: str, source_path: str) -> Optional["RenderManifest"]:
+        """매니페스트를 읽어 완료 표시가 있지만 파일이 없는 청크는 미완료로 되돌립니다.
+
+        원본 크기가 달라졌거나 형식이 맞지 않으면 None을 반환합니다.
+        """
+        path = os.path.join(directory, _MANIFEST)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        if data.get("source_size") != os.path.getsize(source_path):
+            return None
+
+        manifest = cls(path, data)
+        for chunk in manifest.chunks:
+            chunk_path = manifest.chunk_path(chunk)
+            if chunk["done"] and not (os.path.exists(chunk_path) and os.path.getsize(chunk_path) > 0):
+                chunk["done"] = False
+        return manifest
+
+    def chunk_path(self, chunk: dict) -> str:
+        return os.path.join(self.directory, chunk["file"])
+
+    def part_path(self, chunk: dict) -> str:
+        """인코딩 중인 청크 경로. 완료 후 chunk_path로 rename하므로 반쯤 쓰인 파일이 완료로 보이지 않습니다.
+
+        서버가 강제 종료되어도 ffmpeg 자식 프로세스는 남아 계속 쓸 수 있으므로, 프로세스 ID를 넣어
+        재개한 렌더링이 같은 파일에 겹쳐 쓰지 않게 합니다.
+        """
+        stem, ext = os.path.splitext(chunk["file"])
+        return os.path.join(self.directory, f"{stem}.{os.getpid()}.part{ext}")
+
+    def pending(self) -> list[dict]:
+        return [c for c in self.chunks if not c["done"]]
+
+    def mark_done(self, chunk: dict, streams: Optional[dict] = None) -> None:
+        """청크를 완료로 표시합니다. streams는 연결 후 길이/싱크 검사에 쓰는 스트림별 길이(초)입니다."""
+        chunk["done"] = True
+        chunk["streams"] = streams
+        self.save()
+
+    def save(self) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def remove_job_dir(directory: str) -> None:
+    shutil.rmtree(directory, ignore_errors=True)
+    # 비어 있는 프로젝트 디렉터리도 정리
+    try:
+        os.rmdir(os.path.dirname(directory))
+    except OSError:
+        pass
+
+
+def cleanup_segments(keep: set[str]) -> list[str]:
+    """재개 대상이 아닌 segments 하위 항목(이전 mkdtemp 디렉터리, 끝난 작업 디렉터리)을 지웁니다.
+
+    다른 프로세스가 잠금을 쥐고 있는 작업 디렉터리(진행 중인 렌더링)는 건드리지 않습니다.
+    """
+    root = media_cache.class_dir("segments")
+    keep = {os.path.abspath(path) for path in keep}
+    removed: list[str] = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) and name.isdigit():
+            for job_name in os.listdir(path):
+                job_path = os.path.abspath(os.path.join(path, job_name))
+                if job_path not in keep and not is_locked(job_path):
+                    shutil.rmtree(job_path, ignore_errors=True)
+                    removed.append(job_path)
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+        elif os.path.abspath(path) not in keep:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+            removed.append(path)
+    return removed
@@ -0,0 +1,236 @@
+"""프로젝트 리비전 카운터와 직렬화 응답 캐시.
+
+`project_revisions` 테이블은 projects/subtitles/highlights 테이블의 트리거로
+갱신되므로 자막 저장(PUT), STT, 하이라이트 추출, 렌더링 상태 변경 등 모든
+쓰기 경로가 별도 코드 없이 프로젝트 리비전을 올립니다. 트리거는 해당 프로젝트의
+행만 올리므로 여러 프로젝트의 쓰기가 한 전역 행을 두고 경합하지 않고, projects
+트리거는 응답에 직렬화되는 컬럼의 값이 실제로 바뀔 때만 동작합니다.
+
+전역 시퀀스(`revision_seq`)는 프로젝트를 만들 때만 올려 세대(generation)로 기록하므로,
+삭제된 프로젝트의 ID가 재사용되어도 (세대, 리비전)이 이전 ETag와 겹치지 않습니다.
+
+읽기 엔드포인트는 리비전으로 ETag를 만들어 If-None-Match가 일치하면 304를 반환하고,
+그렇지 않으면 (프로젝트, 리소스, 리비전) 단위로 캐시한 JSON 바이트를 그대로 돌려줍니다.
+SQLite가 아닌 DB에서는 캐시 없이 매번 조회합니다.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from metrics import RESPONSE_CACHE_REQUESTS
+
+load_dotenv()
+
+# 직렬화 응답 캐시 용량 (MB)
+RESPONSE_CACHE_MB = float(os.getenv("RESPONSE_CACHE_MB") or 64)
+
+REVISION_TABLE = "project_revisions"
+
+# (세대, 리비전)
+Revision = tuple[int, int]
+
+# ProjectResponse에 직렬화되는 컬럼 (id/created_at은 바뀌지 않음)
+_PROJECT_COLUMNS = ("title", "status", "source_url", "source_path", "output_path")
+
+_BUMP = "UPDATE project_revisions SET revision = revision + 1 WHERE project_id IN ({ids});"
+
+_TRIGGERS = {
+    "project_revisions_projects_ai": """
+    CREATE TRIGGER project_revisions_projects_ai AFTER INSERT ON projects BEGIN
+        UPDATE revision_seq SET value = value + 1 WHERE id = 1;
+        INSERT OR REPLACE INTO project_revisions(project_id, generation, revision)
+        VALUES (new.id, (SELECT value FROM revision_seq WHERE id = 1), 0);
+    END
+    """,
+    "project_revisions_projects_au": f"""
+    CREATE TRIGGER project_revisions_projects_au AFTER UPDATE OF {", ".join(_PROJECT_COLUMNS)} ON projects
+    WHEN {" OR ".join(f"old.{c} IS NOT new.{c}" for c in _PROJECT_COLUMNS)} BEGIN
+        {_BUMP.format(ids="new.id")}
+    END
+    """,
+    "project_revisions_projects_ad": """
+    CREATE TRIGGER project_revisions_projects_ad AFTER DELETE ON projects BEGIN
+        DELETE FROM project_revisions WHERE project_id = old.id;
+    END
+    """,
+}
+for _table in ("subtitles", "highlights"):
+    _TRIGGERS.update({
+        f"project_revisions_{_table}_ai": f"""
+        CREATE TRIGGER project_revisions_{_table}_ai AFTER INSERT ON {_table} BEGIN
+            {_BUMP.format(ids="new.project_id")}
+        END
+        """,
+        f"project_revisions_{_table}_au": f"""
+        CREATE TRIGGER project_revisions_{_table}_au AFTER UPDATE ON {_table} BEGIN
+            {_BUMP.format(ids="old.project_id, new.project_id")}
+        END
+        """,
+        f"project_revisions_{_table}_ad": f"""
+        CREATE TRIGGER project_revisions_{_table}_ad AFTER DELETE ON {_table} BEGIN
+            {_BUMP.format(ids="old.project_id")}
+        END
+        """,
+    })
+
+
+def _is_sqlite(bind) -> bool:
+    return bind.dialect.name == "sqlite"
+
+
+def init_revisions(engine) -> None:
+    """리비전 테이블과 트리거를 만들고, 기존 프로젝트의 리비전 행을 채웁니다.
+
+    트리거는 매번 다시 만들어 정의가 바뀐 이전 버전의 트리거를 교체합니다.
+    """
+    if not _is_sqlite(engine):
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS revision_seq (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)"))
+        conn.execute(text("INSERT OR IGNORE INTO revision_seq(id, value) VALUES (1, 0)"))
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {REVISION_TABLE} "
+            "(project_id INTEGER PRIMARY KEY, generation INTEGER NOT NULL DEFAULT 0, revision INTEGER NOT NULL)"
+        ))
+        columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({REVISION_TABLE})"))}
+        if "generation" not in columns:
+            # 전역 시퀀스로 리비전을 매기던 이전 행은 세대 0으로 두고 리비전을 그대로 이어갑니다.
+            conn.execute(text(f"ALTER TABLE {REVISION_TABLE} ADD COLUMN generation INTEGER NOT NULL DEFAULT 0"))
+        for name, trigger in _TRIGGERS.items():
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+            conn.execute(text(trigger))
+        conn.execute(text("UPDATE revision_seq SET value = value + 1 WHERE id = 1"))
+        conn.execute(text(
+            f"INSERT OR IGNORE INTO {REVISION_TABLE}(project_id, generation, revision) "
+            "SELECT id, (SELECT value FROM revision_seq WHERE id = 1), 0 FROM projects"
+        ))
+
+
+async def get_revision(db: AsyncSession, project_id: int) -> Optional[Revision]:
+    """프로젝트의 현재 (세대, 리비전)을 반환합니다. 프로젝트가 없으면 None."""
+    row = (await db.execute(
+        text(f"SELECT generation, revision FROM {REVISION_TABLE} WHERE project_id = :project_id"),
+        {"project_id": project_id},
+    )).first()
+    return (row[0], row[1]) if row is not None else None
+
+
+class ResponseCache:
+    """(프로젝트, 리소스) 단위로 마지막 리비전의 직렬화된 JSON을 보관하는 LRU 캐시."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[int, str], tuple[Revision, bytes]] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, project_id: int, resource: str, revision: Revision) -> Optional[bytes]:
+        key = (project_id, resource)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != revision:
+                # 리비전이 바뀌었으면 이전 응답은 더 이상 쓸 수 없음
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, project_id: int, resource: str, revision: Revision, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        key = (project_id, resource)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[0] > revision:
+                # 더 새로운 리비전이 이미 캐시됨 (동시 요청 경합)
+                return
+            self._drop(key)
+            self._entries[key] = (revision, body)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, project_id: int) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == project_id]:
+                self._drop(key)
+
+    def _drop(self, key: tuple[int, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "used_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+response_cache = ResponseCache(int(RESPONSE_CACHE_MB * 1024 * 1024))
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _serialize(adapter: TypeAdapter, data: Any) -> bytes:
+    """ORM 객체를 응답 스키마로 검증한 뒤 JSON 바이트로 직렬화합니다."""
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+async def cached_json(
+    request: Request,
+    db: AsyncSession,
+    project_id: int,
+    resource: str,
+    adapter: TypeAdapter,
+    load: Callable[[], Awaitable[Any]],
+) -> Response:
+    """리비전 기반 ETag/304와 직렬화 응답 캐시를 적용해 JSON 응답을 만듭니다.
+
+    리비전을 데이터보다 먼저 읽으므로, 조회 중 쓰기가 끼어들면 새 데이터가 이전
+    리비전으로 캐시될 수는 있어도 이전 데이터가 새 리비전으로 캐시되지는 않습니다.
+    load는 응답 데이터를 조회하고, 대상이 없으면 HTTPException을 발생시킵니다.
+    """
+    if not _is_sqlite(db.bind):
+        return Response(_serialize(adapter, await load()), media_type="application/json")
+
+    revision = await get_revision(db, project_id)
+    if revision is None:
+        response_cache.invalidate(project_id)
+        raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
+
+    etag = f'"{project_id}-{revision[0]}.{revision[1]}-{resource}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        RESPONSE_CACHE_REQUESTS.labels(resource=resource, result="not_modified").inc()
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(project_id, resource, revision)
+    if body is None:
+        RESPONSE_CACHE_REQUESTS.labels(resource=resource, result="miss").inc()
+        body = _serialize(adapter, await load())
+        response_cache.put(project_id, resource, revision, body)
+    else:
+        RESPONSE_CACHE_REQUESTS.labels(resource=resource, result="hit").inc()
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,24 +1,41 @@
 import os
 import json
 import tempfile
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from pydantic import TypeAdapter
 
-from database import get_db, SessionLocal
+from database import get_db, get_async_db, SessionLocal
+from dependencies import get_project
 from models import Project, Subtitle, Highlight
 from schemas import HighlightResponse
+from scheduler import encode_scheduler
+from metrics import timed, enter_background, current_route, LLM_TOKENS
+from ffmpeg_runner import run_ffmpeg, save_encode_stat, FFmpegRunError
+from media_cache import media_cache
+from jobs import job_registry, JobCancelled, CANCEL_WAIT_SECONDS
+from revisions import cached_json
+from routers.ingest import ensure_source, source_available, source_dir
+import signal_analysis
+import timeline_analysis
 from dotenv import load_dotenv
 
 load_dotenv()
 
 router = APIRouter(prefix="/projects", tags=["ai"])
 
+_HIGHLIGHTS = TypeAdapter(List[HighlightResponse])
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 WHISPER_FILE_SIZE_LIMIT = 25 * 1024 * 1024  # 25MB
 
 
-def _extract_audio_if_needed(source_path: str) -> tuple[str, bool]:
+def _extract_audio_if_needed(source_path: str, project_id: Optional[int] = None) -> tuple[str, bool]:
     """
     영상 파일이 25MB를 초과하면 ffmpeg으로 오디오만 추출합니다.
     Returns (파일경로, 임시파일여부)
@@ -32,16 +49,41 @@ def _extract_audio_if_needed(source_path: str) -> tuple[str, bool]:
     audio_path = tmp.name
 
     import ffmpeg as ffmpeg_lib
-    (
-        ffmpeg_lib
-        .input(source_path)
-        .output(audio_path, acodec="libmp3lame", audio_bitrate="64k", vn=None)
-        .overwrite_output()
-        .run(quiet=True)
-    )
+    stats: Optional[dict] = None
+    try:
+        with encode_scheduler.slot("audio", label=source_path) as threads:
+            with timed("audio_extract", project_id) as stage_info:
+                stats = run_ffmpeg(
+                    ffmpeg_lib
+                    .input(source_path)
+                    .output(audio_path, acodec="libmp3lame", audio_bitrate="64k", vn=None, threads=threads)
+                    .overwrite_output(),
+                    kind="audio",
+                )
+                stage_info["bytes"] = os.path.getsize(audio_path)
+    except Exception as e:
+        # 실패/취소 시 임시 오디오 파일을 남기지 않습니다.
+        if isinstance(e, FFmpegRunError):
+            stats = e.stats
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+        raise
+    finally:
+        if project_id is not None and stats is not None:
+            _save_audio_stat(project_id, stats)
     return audio_path, True
 
 
+def _save_audio_stat(project_id: int, stats: dict) -> None:
+    """오디오 추출 ffmpeg 통계를 별도 세션으로 저장합니다."""
+    db = SessionLocal()
+    try:
+        save_encode_stat(db, project_id, stats)
+        db.commit()
+    finally:
+        db.close()
+
+
 def _transcribe_video(project_id: int, source_path: str):
     """Whisper API로 STT를 수행하고 자막을 DB에 저장합니다."""
     from openai import OpenAI
@@ -49,25 +91,38 @@ def _transcribe_video(project_id: int, source_path: str):
     db = SessionLocal()
     audio_path = None
     is_temp = False
+    previous_status = None
+    job = job_registry.begin(project_id, "transcribe")
+    media_cache.acquire(source_dir(project_id))
     try:
+        job.check()
         project = db.query(Project).filter(Project.id == project_id).first()
         if not project:
             return
 
+        previous_status = project.status
         project.status = "transcribing"
         db.commit()
 
-        audio_path, is_temp = _extract_audio_if_needed(source_path)
+        source_path = ensure_source(db, project)
+        audio_path, is_temp = _extract_audio_if_needed(source_path, project_id)
 
         client = OpenAI(api_key=OPENAI_API_KEY)
-
-        with open(audio_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="verbose_json",
-                timestamp_granularities=["segment"],
-            )
+        # 취소 시 업로드 중인 연결을 닫고 응답을 기다리지 않습니다.
+        job.on_cancel(client.close)
+
+        def request_transcript():
+            with open(audio_path, "rb") as audio_file:
+                return client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    response_format="verbose_json",
+                    timestamp_granularities=["segment"],
+                )
+
+        with timed("stt", project_id) as stage_info:
+            transcript = job.wait(request_transcript)
+            stage_info["segments"] = len(transcript.segments or [])
 
         db.query(Subtitle).filter(Subtitle.project_id == project_id).delete()
 
@@ -83,6 +138,13 @@ def _transcribe_video(project_id: int, source_path: str):
         project.status = "ready"
         db.commit()
 
+    except JobCancelled:
+        db.rollback()
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if project and previous_status is not None:
+            project.status = previous_status
+            db.commit()
+        print(f"[ai] STT 취소 (project_id={project_id})")
     except Exception as e:
         project = db.query(Project).filter(Project.id == project_id).first()
         if project:
@@ -91,8 +153,34 @@ def _transcribe_video(project_id: int, source_path: str):
         print(f"[ai] STT 오류 (project_id={project_id}): {e}")
     finally:
         db.close()
+        media_cache.release(source_dir(project_id))
         if is_temp and audio_path and os.path.exists(audio_path):
             os.remove(audio_path)
+        job_registry.end(job)
+
+
+def _build_transcript_text(project_id: int, source_path: Optional[str], subtitles: list) -> Optional[str]:
+    """긴 영상이면 신호 분석 상위 구간의 자막만 모아 반환합니다. 적용하지 않으면 None."""
+    if subtitles[-1].end_time < signal_analysis.PREFILTER_MIN_SECONDS:
+        return None
+    if not source_path or not os.path.exists(source_path):
+        return None
+
+    try:
+        with media_cache.pin(source_dir(project_id)):
+            windows = signal_analysis.candidate_windows(project_id, source_path, subtitles)
+    except Exception as e:
+        print(f"[ai] 신호 분석 오류, 전체 자막 사용 (project_id={project_id}): {e}")
+        return None
+    if not windows:
+        return None
+
+    blocks = []
+    for i, (window, subs) in enumerate(signal_analysis.filter_subtitles(subtitles, windows)):
+        lines = [f"## 후보 구간 {i + 1} ({window['start']:.0f}s ~ {window['end']:.0f}s)"]
+        lines += [f"[{s.start_time:.1f}s ~ {s.end_time:.1f}s] {s.text}" for s in subs]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
 
 
 def _extract_highlights_bg(project_id: int):
@@ -100,6 +188,7 @@ def _extract_highlights_bg(project_id: int):
     from openai import OpenAI
 
     db = SessionLocal()
+    route_token = enter_background()
     try:
         project = db.query(Project).filter(Project.id == project_id).first()
         if not project:
@@ -120,15 +209,22 @@ def _extract_highlights_bg(project_id: int):
             db.commit()
             return
 
-        transcript_text = "\n".join(
-            [f"[{s.start_time:.1f}s ~ {s.end_time:.1f}s] {s.text}" for s in subtitles]
-        )
+        transcript_text = _build_transcript_text(project_id, project.source_path, subtitles)
+        prefiltered = transcript_text is not None
+        if not prefiltered:
+            transcript_text = "\n".join(
+                [f"[{s.start_time:.1f}s ~ {s.end_time:.1f}s] {s.text}" for s in subtitles]
+            )
 
         client = OpenAI(api_key=OPENAI_API_KEY)
 
+        candidate_note = (
+            "아래 자막은 오디오 신호 분석으로 고른 후보 구간들입니다. 하이라이트는 후보 구간 안에서 골라주세요.\n"
+            if prefiltered else ""
+        )
         prompt = f"""다음은 영상의 자막입니다. 숏폼 콘텐츠로 활용하기 좋은 핵심 하이라이트 구간 3~5개를 추출해주세요.
 각 구간은 30초~60초 이내로 설정해주세요.
-
+{candidate_note}
 자막:
 {transcript_text}
 
@@ -144,23 +240,39 @@ def _extract_highlights_bg(project_id: int):
   ]
 }}"""
 
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-        )
+        with timed("llm", project_id) as stage_info:
+            response = client.chat.completions.create(
+                model="gpt-4o",
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"},
+            )
+            if response.usage:
+                LLM_TOKENS.labels(kind="prompt").inc(response.usage.prompt_tokens)
+                LLM_TOKENS.labels(kind="completion").inc(response.usage.completion_tokens)
+                stage_info["prompt_tokens"] = response.usage.prompt_tokens
+                stage_info["completion_tokens"] = response.usage.completion_tokens
 
         result = json.loads(response.choices[0].message.content)
         highlights_data = result.get("highlights", [])
 
         db.query(Highlight).filter(Highlight.project_id == project_id).delete()
 
+        # 장면 전환 인덱스가 있으면 구간 경계를 가까운 컷에 맞춥니다.
+        scene_times = np.array([s["time"] for s in timeline_analysis.load_scenes(project_id)])
+
         for idx, item in enumerate(highlights_data):
+            start_time = float(item.get("start_time", 0))
+            end_time = float(item.get("end_time", 0))
+            snapped_start = timeline_analysis.snap_to_scene(start_time, scene_times)
+            snapped_end = timeline_analysis.snap_to_scene(end_time, scene_times)
+            if snapped_end > snapped_start:
+                start_time, end_time = snapped_start, snapped_end
+
             highlight = Highlight(
                 project_id=project_id,
                 title=item.get("title", f"하이라이트 {idx + 1}"),
-                start_time=float(item.get("start_time", 0)),
-                end_time=float(item.get("end_time", 0)),
+                start_time=start_time,
+                end_time=end_time,
                 reason=item.get("reason"),
                 order=idx,
             )
@@ -177,6 +289,7 @@ def _extract_highlights_bg(project_id: int):
         print(f"[ai] 하이라이트 추출 오류 (project_id={project_id}): {e}")
     finally:
         db.close()
+        current_route.reset(route_token)
 
 
 @router.post("/{project_id}/transcribe")
@@ -190,19 +303,28 @@ def transcribe(
     if not project:
         raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
 
-    if not project.source_path or not os.path.exists(project.source_path):
+    if not source_available(project):
         raise HTTPException(
             status_code=400,
             detail="다운로드된 영상 파일이 없습니다. 먼저 다운로드를 완료하세요.",
         )
 
-    if project.status == "transcribing":
+    if job_registry.claim(project_id, "transcribe") is None:
         raise HTTPException(status_code=409, detail="이미 자막 추출 중입니다.")
 
     background_tasks.add_task(_transcribe_video, project_id, project.source_path)
     return {"message": "STT를 시작했습니다.", "project_id": project_id}
 
 
+@router.post("/{project_id}/transcribe/cancel")
+async def cancel_transcribe(project: Project = Depends(get_project)):
+    """진행 중인 STT를 취소합니다. 오디오 추출 ffmpeg와 Whisper 요청을 중단합니다."""
+    results = await run_in_threadpool(job_registry.cancel, project.id, "transcribe", CANCEL_WAIT_SECONDS)
+    if not results:
+        raise HTTPException(status_code=409, detail="진행 중인 자막 추출이 없습니다.")
+    return {"message": "자막 추출을 취소했습니다.", "project_id": project.id, **results[0]}
+
+
 @router.post("/{project_id}/highlight")
 def extract_highlight(
     project_id: int,
@@ -232,16 +354,27 @@ def extract_highlight(
     return {"message": "하이라이트 추출을 시작했습니다.", "project_id": project_id}
 
 
-@router.get("/{project_id}/highlights", response_model=List[HighlightResponse])
-def get_highlights(project_id: int, db: Session = Depends(get_db)):
-    """저장된 하이라이트 구간 목록을 반환합니다."""
+@router.get("/{project_id}/highlights", responses={200: {"model": List[HighlightResponse]}})
+async def get_highlights(project_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """저장된 하이라이트 구간 목록을 반환합니다. 리비전이 같으면 304 또는 캐시된 응답을 반환합니다."""
+
+    async def load():
+        result = await db.scalars(
+            select(Highlight).where(Highlight.project_id == project_id).order_by(Highlight.order)
+        )
+        return result.all()
+
+    return await cached_json(request, db, project_id, "highlights", _HIGHLIGHTS, load)
+
+
+@router.get("/{project_id}/highlight-candidates")
+def get_highlight_candidates(project_id: int, db: Session = Depends(get_db)):
+    """오디오 신호 분석으로 캐시된 하이라이트 후보 구간을 반환합니다."""
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
 
-    return (
-        db.query(Highlight)
-        .filter(Highlight.project_id == project_id)
-        .order_by(Highlight.order)
-        .all()
-    )
+    windows = signal_analysis.cached_candidate_windows(project_id)
+    if windows is None:
+        raise HTTPException(status_code=404, detail="분석된 후보 구간이 없습니다. 먼저 하이라이트 추출을 실행하세요.")
+    return {"project_id": project_id, "windows": windows}
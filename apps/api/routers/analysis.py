@@ -0,0 +1,165 @@
+import os
+import threading
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from database import get_db, SessionLocal
+from models import Project
+from ffmpeg_runner import save_encode_stat
+from media_cache import media_cache
+from jobs import job_registry, JobCancelled
+from routers.ingest import ensure_source, source_available, source_dir
+import timeline_analysis
+import reframe
+
+router = APIRouter(prefix="/projects", tags=["analysis"])
+
+
+def _analyze_timeline_bg(project_id: int):
+    """파형 피크와 장면 전환 인덱스를 생성합니다. 프로젝트 상태는 바꾸지 않습니다.
+
+    중복 실행은 호출 전에 job_registry.claim으로 막습니다.
+    """
+    db = SessionLocal()
+    job = job_registry.begin(project_id, "analysis")
+    media_cache.acquire(source_dir(project_id))
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            return
+        source_path = ensure_source(db, project)
+        timeline_analysis.analyze_timeline(project_id, source_path)
+    except JobCancelled:
+        print(f"[analysis] 타임라인 분석 취소 (project_id={project_id})")
+    except Exception as e:
+        print(f"[analysis] 타임라인 분석 오류 (project_id={project_id}): {e}")
+    finally:
+        db.close()
+        media_cache.release(source_dir(project_id))
+        job_registry.end(job)
+
+
+def queue_timeline_analysis(project_id: int) -> bool:
+    """요청 밖(다운로드 완료 등)에서 타임라인 분석을 별도 스레드로 시작합니다.
+
+    이미 대기/실행 중이면 False를 반환합니다.
+    """
+    if job_registry.claim(project_id, "analysis") is None:
+        return False
+    threading.Thread(
+        target=_analyze_timeline_bg,
+        args=(project_id,),
+        name=f"timeline-analysis-{project_id}",
+        daemon=True,
+    ).start()
+    return True
+
+
+@router.post("/{project_id}/analyze")
+def analyze_timeline(
+    project_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """파형 피크/장면 전환 분석을 시작합니다 (백그라운드 처리)."""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
+
+    if not source_available(project):
+        raise HTTPException(status_code=400, detail="다운로드된 영상 파일이 없습니다.")
+
+    if job_registry.claim(project_id, "analysis") is None:
+        raise HTTPException(status_code=409, detail="이미 분석 중입니다.")
+
+    background_tasks.add_task(_analyze_timeline_bg, project_id)
+    return {"message": "타임라인 분석을 시작했습니다.", "project_id": project_id}
+
+
+@router.get("/{project_id}/waveform/meta")
+def get_waveform_meta(project_id: int):
+    """파형 파일의 줌 레벨별 오프셋/길이 등 메타데이터를 반환합니다."""
+    meta = timeline_analysis.load_meta(project_id)
+    if meta is None or not os.path.exists(timeline_analysis.waveform_path(project_id)):
+        raise HTTPException(status_code=404, detail="파형 데이터가 없습니다. 먼저 분석을 실행하세요.")
+    return {"project_id": project_id, "analyzing": job_registry.is_running(project_id, "analysis"), **meta}
+
+
+@router.get("/{project_id}/waveform")
+def get_waveform(project_id: int):
+    """파형 피크 바이너리를 반환합니다. Range 요청으로 특정 레벨만 받을 수 있습니다."""
+    path = timeline_analysis.waveform_path(project_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="파형 데이터가 없습니다. 먼저 분석을 실행하세요.")
+    media_cache.touch(path)
+    return FileResponse(path, media_type="application/octet-stream")
+
+
+@router.get("/{project_id}/scenes")
+def get_scenes(project_id: int):
+    """장면 전환 시각 목록을 반환합니다."""
+    meta = timeline_analysis.load_meta(project_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="장면 전환 데이터가 없습니다. 먼저 분석을 실행하세요.")
+    return {
+        "project_id": project_id,
+        "threshold": meta["scene_threshold"],
+        "scenes": timeline_analysis.load_scenes(project_id),
+    }
+
+
+def _reframe_bg(project_id: int):
+    """스마트 크롭 경로를 미리 계산해 캐시하고 분석 비용을 인코딩 통계로 남깁니다.
+
+    중복 실행은 호출 전에 job_registry.claim으로 막습니다.
+    """
+    db = SessionLocal()
+    job = job_registry.begin(project_id, "reframe")
+    media_cache.acquire(source_dir(project_id))
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if not project:
+            return
+        source_path = ensure_source(db, project)
+        result = reframe.analyze_reframe(project_id, source_path)
+        save_encode_stat(db, project_id, result["cost"])
+        db.commit()
+    except JobCancelled:
+        print(f"[analysis] 리프레이밍 분석 취소 (project_id={project_id})")
+    except Exception as e:
+        print(f"[analysis] 리프레이밍 분석 오류 (project_id={project_id}): {e}")
+    finally:
+        db.close()
+        media_cache.release(source_dir(project_id))
+        job_registry.end(job)
+
+
+@router.post("/{project_id}/reframe")
+def analyze_reframe(
+    project_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """스마트 크롭 경로 분석을 시작합니다 (백그라운드 처리). 렌더링 시 없으면 자동으로 계산합니다."""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
+
+    if not source_available(project):
+        raise HTTPException(status_code=400, detail="다운로드된 영상 파일이 없습니다.")
+
+    if job_registry.claim(project_id, "reframe") is None:
+        raise HTTPException(status_code=409, detail="이미 분석 중입니다.")
+
+    background_tasks.add_task(_reframe_bg, project_id)
+    return {"message": "리프레이밍 분석을 시작했습니다.", "project_id": project_id}
+
+
+@router.get("/{project_id}/reframe")
+def get_reframe(project_id: int):
+    """캐시된 스마트 크롭 경로(정규화 중심 좌표)와 분석 비용을 반환합니다."""
+    result = reframe.load_reframe(project_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="리프레이밍 데이터가 없습니다. 먼저 분석을 실행하세요.")
+    return {"project_id": project_id, "analyzing": job_registry.is_running(project_id, "reframe"), **result}
@@ -1,10 +1,16 @@
 import os
 import asyncio
+import threading
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from database import get_db
 from models import Project
+from dependencies import get_project
+from metrics import timed, log_event, enter_background, current_route, DOWNLOAD_BYTES
+from media_cache import media_cache
+from jobs import job_registry, current_job, check_cancelled, JobCancelled, CANCEL_WAIT_SECONDS
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,63 +20,176 @@ MEDIA_BASE_PATH = os.getenv("MEDIA_BASE_PATH", "./media")
 router = APIRouter(prefix="/projects", tags=["ingest"])
 
 
+def _cancel_hook(_status: dict) -> None:
+    """yt-dlp 진행 훅. 현재 작업이 취소되었으면 다운로드를 중단시킵니다."""
+    check_cancelled()
+
+
+def _fetch_source(project_id: int, url: str, output_dir: str) -> str:
+    """yt-dlp로 원본 영상을 output_dir에 내려받고 파일 경로를 반환합니다.
+
+    현재 작업이 취소되면 다운로드를 멈추고 이번에 생긴 부분 파일(.part 등)을 지웁니다.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    existing_files = set(os.listdir(output_dir))
+
+    import yt_dlp
+
+    ydl_opts = {
+        "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
+        "outtmpl": os.path.join(output_dir, "%(title)s.%(ext)s"),
+        "merge_output_format": "mp4",
+        "quiet": False,
+        "no_warnings": False,
+        # YouTube 403 오류 해결을 위한 옵션
+        "extractor_args": {
+            "youtube": {
+                "player_client": ["android"],  # android 클라이언트 사용 (403 오류 회피)
+            }
+        },
+        # User-Agent 설정 (최신 Chrome)
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+        # 재시도 설정
+        "retries": 10,
+        "fragment_retries": 10,
+        # 추가 헤더 설정
+        "http_headers": {
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-us,en;q=0.5",
+            "Accept-Encoding": "gzip, deflate",
+            "Accept-Charset": "ISO-8859-1,utf-8;q=0.7,*;q=0.7",
+            "Keep-Alive": "300",
+            "Connection": "keep-alive",
+        },
+        # 다운로드 청크/후처리마다 취소 여부 확인
+        "progress_hooks": [_cancel_hook],
+        "postprocessor_hooks": [_cancel_hook],
+    }
+
+    with media_cache.pin(output_dir):
+        with timed("download", project_id) as stage_info:
+            try:
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    info = ydl.extract_info(url, download=True)
+                    filename = ydl.prepare_filename(info)
+                    # .mp4 확장자 보장
+                    if not filename.endswith(".mp4"):
+                        base, _ = os.path.splitext(filename)
+                        filename = base + ".mp4"
+            except Exception:
+                # yt-dlp가 훅의 예외를 DownloadError로 감싸는 경우에도 취소로 처리
+                job = current_job()
+                if job is None or not job.cancelled:
+                    raise
+                for name in set(os.listdir(output_dir)) - existing_files:
+                    path = os.path.join(output_dir, name)
+                    if os.path.isfile(path):
+                        os.remove(path)
+                raise JobCancelled("다운로드가 취소되었습니다.") from None
+
+            if os.path.exists(filename):
+                size = os.path.getsize(filename)
+                DOWNLOAD_BYTES.observe(size)
+                stage_info["bytes"] = size
+
+        # 새 파일은 고정된 상태에서 한도를 맞춰, 방금 받은 원본이 정리되지 않게 합니다.
+        media_cache.enforce("sources")
+
+    return filename
+
+
+def source_dir(project_id: int) -> str:
+    return os.path.join(MEDIA_BASE_PATH, "uploads", str(project_id))
+
+
+# 같은 프로젝트의 재다운로드가 동시에 실행되지 않도록 프로젝트별 잠금
+_refetch_locks: dict[int, threading.Lock] = {}
+_refetch_locks_guard = threading.Lock()
+
+
+def ensure_source(db: Session, project: Project) -> str:
+    """원본 파일 경로를 반환합니다. 캐시 정리로 삭제되었다면 source_url에서 다시 받습니다."""
+    if project.source_path and os.path.exists(project.source_path):
+        media_cache.touch(project.source_path)
+        return project.source_path
+
+    if not project.source_url:
+        raise FileNotFoundError(f"영상 파일을 찾을 수 없습니다: {project.source_path}")
+
+    with _refetch_locks_guard:
+        lock = _refetch_locks.setdefault(project.id, threading.Lock())
+
+    with lock:
+        db.refresh(project)
+        if project.source_path and os.path.exists(project.source_path):
+            return project.source_path
+
+        log_event("source_refetch", project.id, url=project.source_url)
+        project.source_path = _fetch_source(project.id, project.source_url, source_dir(project.id))
+        db.commit()
+
+    return project.source_path
+
+
+def _refetch_source_bg(project_id: int):
+    """삭제된 원본을 백그라운드에서 다시 내려받습니다 (프로젝트 상태는 바꾸지 않음)."""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    route_token = enter_background()
+    try:
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if project:
+            with media_cache.pin(source_dir(project_id)):
+                ensure_source(db, project)
+    except Exception as e:
+        print(f"[ingest] 원본 재다운로드 오류 (project_id={project_id}): {e}")
+    finally:
+        db.close()
+        current_route.reset(route_token)
+
+
+def source_available(project: Project) -> bool:
+    """원본이 디스크에 있거나 source_url로 다시 받을 수 있으면 True."""
+    if project.source_path and os.path.exists(project.source_path):
+        return True
+    return bool(project.source_path and project.source_url)
+
+
 def _download_video(project_id: int, url: str, output_dir: str):
     """yt-dlp로 영상을 다운로드하고 프로젝트 상태를 업데이트합니다."""
     from database import SessionLocal
 
     db = SessionLocal()
+    previous_status = None
+    job = job_registry.begin(project_id, "download")
     try:
+        job.check()
         project = db.query(Project).filter(Project.id == project_id).first()
         if not project:
             return
 
+        previous_status = project.status
         project.status = "downloading"
         db.commit()
 
-        os.makedirs(output_dir, exist_ok=True)
-
-        import yt_dlp
-
-        ydl_opts = {
-            "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
-            "outtmpl": os.path.join(output_dir, "%(title)s.%(ext)s"),
-            "merge_output_format": "mp4",
-            "quiet": False,
-            "no_warnings": False,
-            # YouTube 403 오류 해결을 위한 옵션
-            "extractor_args": {
-                "youtube": {
-                    "player_client": ["android"],  # android 클라이언트 사용 (403 오류 회피)
-                }
-            },
-            # User-Agent 설정 (최신 Chrome)
-            "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-            # 재시도 설정
-            "retries": 10,
-            "fragment_retries": 10,
-            # 추가 헤더 설정
-            "http_headers": {
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "Accept-Language": "en-us,en;q=0.5",
-                "Accept-Encoding": "gzip, deflate",
-                "Accept-Charset": "ISO-8859-1,utf-8;q=0.7,*;q=0.7",
-                "Keep-Alive": "300",
-                "Connection": "keep-alive",
-            },
-        }
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            filename = ydl.prepare_filename(info)
-            # .mp4 확장자 보장
-            if not filename.endswith(".mp4"):
-                base, _ = os.path.splitext(filename)
-                filename = base + ".mp4"
+        filename = _fetch_source(project_id, url, output_dir)
 
         project.source_path = filename
         project.status = "ready"
         db.commit()
 
+        # 에디터 타임라인용 파형/장면 전환 분석은 다운로드 작업과 분리해 큐에 넣음
+        from routers.analysis import queue_timeline_analysis
+        queue_timeline_analysis(project_id)
+
+    except JobCancelled:
+        db.rollback()
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if project and previous_status is not None:
+            project.status = previous_status
+            db.commit()
+        print(f"[ingest] 다운로드 취소 (project_id={project_id})")
     except Exception as e:
         project = db.query(Project).filter(Project.id == project_id).first()
         if project:
@@ -79,6 +198,7 @@ def _download_video(project_id: int, url: str, output_dir: str):
         print(f"[ingest] 다운로드 오류 (project_id={project_id}): {e}")
     finally:
         db.close()
+        job_registry.end(job)
 
 
 @router.post("/{project_id}/download")
@@ -94,11 +214,20 @@ def download_video(
     if not project.source_url:
         raise HTTPException(status_code=400, detail="다운로드할 URL이 없습니다. 프로젝트 생성 시 source_url을 지정해주세요.")
 
-    if project.status == "downloading":
-        raise HTTPException(status_code=409, detail="이미 다운로드 중입니다.")
+    output_dir = source_dir(project_id)
 
-    output_dir = os.path.join(MEDIA_BASE_PATH, "uploads", str(project_id))
+    if job_registry.claim(project_id, "download") is None:
+        raise HTTPException(status_code=409, detail="이미 다운로드 중입니다.")
 
     background_tasks.add_task(_download_video, project_id, project.source_url, output_dir)
 
     return {"message": "다운로드를 시작했습니다.", "project_id": project_id, "status": "downloading"}
+
+
+@router.post("/{project_id}/download/cancel")
+async def cancel_download(project: Project = Depends(get_project)):
+    """진행 중인 다운로드를 취소하고 부분 파일을 정리합니다."""
+    results = await run_in_threadpool(job_registry.cancel, project.id, "download", CANCEL_WAIT_SECONDS)
+    if not results:
+        raise HTTPException(status_code=409, detail="진행 중인 다운로드가 없습니다.")
+    return {"message": "다운로드를 취소했습니다.", "project_id": project.id, **results[0]}
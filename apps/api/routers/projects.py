@@ -1,16 +1,33 @@
 import os
 import json
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
 from fastapi.responses import FileResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from pydantic import TypeAdapter
 
-from database import get_db
+from database import get_db, get_async_db
+from dependencies import get_project as load_project
 from models import Project, Subtitle
 from schemas import ProjectCreate, ProjectResponse, ProjectStatusResponse, SubtitleResponse, SubtitleUpdate
+from media_cache import media_cache
+from jobs import job_registry, CANCEL_WAIT_SECONDS
+from revisions import cached_json, response_cache
+from routers.ingest import source_available, _refetch_source_bg
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
+_PROJECT = TypeAdapter(ProjectResponse)
+_SUBTITLES = TypeAdapter(List[SubtitleResponse])
+
+
+def _project_response(project: Project) -> ProjectResponse:
+    """프로젝트 응답을 만들고 결과 파일 경로를 공개 URL로 변환합니다."""
+    output_url = media_cache.url_for(project.output_path) if project.output_path else None
+    return ProjectResponse.model_validate(project).model_copy(update={"output_url": output_url})
+
 
 @router.post("", response_model=ProjectResponse)
 def create_project(payload: ProjectCreate, db: Session = Depends(get_db)):
@@ -18,36 +35,41 @@ def create_project(payload: ProjectCreate, db: Session = Depends(get_db)):
     db.add(project)
     db.commit()
     db.refresh(project)
-    return project
+    return _project_response(project)
 
 
 @router.get("", response_model=List[ProjectResponse])
-def list_projects(db: Session = Depends(get_db)):
-    return db.query(Project).order_by(Project.created_at.desc()).all()
+async def list_projects(db: AsyncSession = Depends(get_async_db)):
+    result = await db.scalars(select(Project).order_by(Project.created_at.desc()))
+    return [_project_response(project) for project in result.all()]
 
 
-@router.get("/{project_id}", response_model=ProjectResponse)
-def get_project(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
-    return project
+@router.get("/{project_id}", responses={200: {"model": ProjectResponse}})
+async def get_project(project_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """프로젝트를 반환합니다. 리비전이 같으면 304 또는 캐시된 응답을 반환합니다."""
+
+    async def load():
+        return _project_response(await load_project(project_id, db))
+
+    return await cached_json(request, db, project_id, "project", _PROJECT, load)
 
 
 @router.get("/{project_id}/status", response_model=ProjectStatusResponse)
-def get_project_status(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
+async def get_project_status(project: Project = Depends(load_project)):
     return project
 
 
-@router.get("/{project_id}/subtitles", response_model=List[SubtitleResponse])
-def get_subtitles(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
-    return db.query(Subtitle).filter(Subtitle.project_id == project_id).order_by(Subtitle.start_time).all()
+@router.get("/{project_id}/subtitles", responses={200: {"model": List[SubtitleResponse]}})
+async def get_subtitles(project_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """자막 목록을 반환합니다. 리비전이 같으면 304 또는 캐시된 응답을 반환합니다."""
+
+    async def load():
+        result = await db.scalars(
+            select(Subtitle).where(Subtitle.project_id == project_id).order_by(Subtitle.start_time)
+        )
+        return result.all()
+
+    return await cached_json(request, db, project_id, "subtitles", _SUBTITLES, load)
 
 
 @router.put("/{project_id}/subtitles")
@@ -73,14 +95,23 @@ def update_subtitles(project_id: int, payload: SubtitleUpdate, db: Session = Dep
 
 
 @router.get("/{project_id}/video")
-def get_project_video(project_id: int, db: Session = Depends(get_db)):
+def get_project_video(project_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
     if not project.source_path:
         raise HTTPException(status_code=404, detail="다운로드된 영상이 없습니다.")
     if not os.path.exists(project.source_path):
+        if source_available(project):
+            # 캐시 정리로 삭제된 원본은 source_url에서 다시 받습니다.
+            background_tasks.add_task(_refetch_source_bg, project_id)
+            raise HTTPException(
+                status_code=503,
+                detail="원본 영상을 다시 내려받는 중입니다. 잠시 후 다시 시도하세요.",
+                headers={"Retry-After": "10"},
+            )
         raise HTTPException(status_code=404, detail=f"영상 파일을 찾을 수 없습니다: {project.source_path}")
+    media_cache.touch(project.source_path)
     return FileResponse(
         project.source_path,
         media_type="video/mp4",
@@ -93,6 +124,9 @@ def delete_project(project_id: int, db: Session = Depends(get_db)):
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
+    # 실행 중인 다운로드/STT/렌더링을 먼저 중단해 삭제 후에도 인코딩이 남지 않도록 합니다.
+    job_registry.cancel(project_id, wait_seconds=CANCEL_WAIT_SECONDS)
     db.delete(project)
     db.commit()
+    response_cache.invalidate(project_id)
     return {"message": "프로젝트가 삭제되었습니다."}
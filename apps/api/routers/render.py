@@ -1,15 +1,44 @@
 import os
+import re
 import json
+import hashlib
 import shutil
-import tempfile
+import subprocess
+import threading
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Body
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 
-from database import get_db, SessionLocal
-from models import Project, Subtitle, Highlight
-from schemas import RenderRequest, RenderProgressResponse
+from database import get_db, get_async_db, SessionLocal
+from dependencies import get_project, path_exists
+from models import Project, Subtitle, Highlight, RenderJob, EncodeStat
+from schemas import RenderRequest, RenderProgressResponse, RenderJobResponse, EncodeStatResponse
+from scheduler import encode_scheduler
+from metrics import timed, observe_encode, log_event
+from ffmpeg_runner import run_ffmpeg, save_encode_stat, FFmpegRunError
+from media_cache import media_cache
+from jobs import job_registry, JobCancelled, CANCEL_WAIT_SECONDS
+from render_checkpoint import (
+    RENDER_CHUNK_SECONDS,
+    JobLock,
+    RenderManifest,
+    is_locked,
+    job_dir,
+    plan_chunks,
+    plan_time_chunks,
+    remove_job_dir,
+    cleanup_segments,
+    subtitles_to_dicts,
+    subtitles_from_dicts,
+)
+import reframe
+from timeline_analysis import load_meta, probe_streams
+from routers.ingest import ensure_source, source_available, source_dir
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,6 +50,35 @@ router = APIRouter(prefix="/projects", tags=["render"])
 # 렌더링 진행률을 인메모리로 추적: {project_id: {"progress": 0-100, "stage": str}}
 _render_progress: dict[int, dict] = {}
 
+HLS_SEGMENT_SECONDS = 4
+
+# showinfo 필터 출력의 프레임 시각
+_SHOWINFO_PTS = re.compile(r"pts_time:(-?\d+(?:\.\d+)?)")
+
+# framecrc 헤더 (#tb 0: 1/12800, #media_type 0: video)
+_FRAMECRC_HEADER = re.compile(r"#(tb|media_type) (\d+): (\S+)")
+
+# 연결 결과의 길이/싱크 검사 기본 허용 오차(초). 이음매 수에 비례한 여유가 더해집니다.
+CONCAT_TOLERANCE_SECONDS = 0.1
+
+# outputs/<project_id>/<내용 해시>/ 디렉터리 이름
+_PUBLISH_DIR_NAME = re.compile(r"[0-9a-f]{16}")
+
+
+def _encode_options(hls: bool = False) -> dict:
+    """공통 인코딩 옵션. moov atom을 앞에 두어(faststart) 첫 수백 KB만으로 재생을 시작합니다."""
+    options = {
+        "acodec": "aac",
+        "vcodec": "libx264",
+        "crf": 23,
+        "preset": "fast",
+        "movflags": "+faststart",
+    }
+    if hls:
+        # HLS 구간 경계와 키프레임을 맞춰 stream copy로 패키징할 수 있게 합니다.
+        options["force_key_frames"] = f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})"
+    return options
+
 
 def _build_drawtext_filters(subtitles: list, time_offset: float = 0.0) -> list[str]:
     """자막 리스트에서 FFmpeg drawtext 필터 문자열을 생성합니다."""
@@ -74,35 +132,320 @@ def _render_segment(
     source_path: str,
     output_path: str,
     start: float,
-    duration: float,
+    duration: Optional[float],
     subtitles: list,
     time_offset: float,
-) -> None:
-    """단일 구간을 FFmpeg로 렌더링합니다."""
+    project_id: Optional[int] = None,
+    hls: bool = False,
+    kind: str = "segment",
+    crop_path: Optional[dict] = None,
+    audio: bool = True,
+) -> dict:
+    """단일 구간을 FFmpeg로 렌더링하고 인코딩 통계를 반환합니다.
+
+    duration이 None이면 start부터 영상 끝까지 인코딩합니다. crop_path(스마트 크롭 경로)가
+    있으면 구간에 해당하는 크롭 위치 명령을 출력 파일 옆에 기록해 시간에 따라 크롭합니다.
+    audio가 False이면 영상만 인코딩합니다 (전체 영상 청크, 오디오는 연결할 때 붙임).
+    """
     import ffmpeg
 
     drawtext_filters = _build_drawtext_filters(subtitles, time_offset=time_offset)
-    crop_and_scale = "crop=ih*9/16:ih,scale=1080:1920"
+    command_path = os.path.splitext(output_path)[0] + ".crop.txt"
+    crop_and_scale = reframe.crop_filter(crop_path, start, duration, command_path) + ",scale=1080:1920"
 
     if drawtext_filters:
         vf_full = crop_and_scale + "," + ",".join(drawtext_filters)
     else:
         vf_full = crop_and_scale
 
-    (
-        ffmpeg
-        .input(source_path, ss=start, t=duration)
-        .output(
-            output_path,
-            vf=vf_full,
-            acodec="aac",
-            vcodec="libx264",
-            crf=23,
-            preset="fast",
+    input_args = {"ss": start}
+    if duration is not None:
+        input_args["t"] = duration
+    output_args = _encode_options(hls)
+    if not audio:
+        del output_args["acodec"]
+        output_args["an"] = None
+
+    with encode_scheduler.slot(kind, estimated_seconds=duration or 0.0, label=output_path) as threads:
+        with timed(f"{kind}_encode", project_id, duration=duration, subtitles=len(drawtext_filters)) as stage_info:
+            stats = run_ffmpeg(
+                ffmpeg
+                .input(source_path, **input_args)
+                .output(output_path, vf=vf_full, threads=threads, **output_args)
+                .global_args("-filter_threads", str(threads))
+                .overwrite_output(),
+                kind=kind,
+            )
+            stage_info.update(fps=stats["fps"], speed=stats["speed"])
+
+    observe_encode(kind, stats["wall_seconds"], stats["frames"] or 0)
+    return stats
+
+
+def _keyframe_times(source_path: str) -> list[float]:
+    """원본 영상 스트림의 키프레임 시각(초) 목록. 키프레임만 디코딩하므로 전체 디코딩보다 훨씬 빠릅니다."""
+    result = subprocess.run(
+        ["ffmpeg", "-nostdin", "-hide_banner", "-skip_frame", "nokey", "-i", source_path,
+         "-map", "0:v:0", "-vf", "showinfo", "-f", "null", "-"],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        return []
+    return [float(value) for value in _SHOWINFO_PTS.findall(result.stderr.decode("utf-8", errors="replace"))]
+
+
+def _stream_durations(path: str) -> dict[str, Optional[float]]:
+    """결과 파일의 영상/오디오 스트림 길이(초)를 구합니다. 해당 스트림이 없으면 None.
+
+    ffprobe가 없으면 `ffmpeg -c copy -f framecrc`로 패킷의 pts/길이를 읽어 계산합니다
+    (디코딩하지 않으므로 빠릅니다).
+    """
+    import ffmpeg
+
+    try:
+        streams = ffmpeg.probe(path)["streams"]
+        durations = {}
+        for kind in ("video", "audio"):
+            stream = next((s for s in streams if s.get("codec_type") == kind), None)
+            durations[kind] = float(stream["duration"]) if stream and stream.get("duration") else None
+        return durations
+    except Exception:
+        pass
+
+    result = subprocess.run(
+        ["ffmpeg", "-nostdin", "-v", "error", "-i", path,
+         "-map", "0:v:0?", "-map", "0:a:0?", "-c", "copy", "-f", "framecrc", "-"],
+        capture_output=True,
+    )
+    kinds: dict[str, str] = {}
+    time_bases: dict[str, float] = {}
+    spans: dict[str, list[int]] = {}
+    for line in result.stdout.decode("ascii", errors="replace").splitlines():
+        if line.startswith("#"):
+            match = _FRAMECRC_HEADER.match(line)
+            if match and match.group(1) == "tb":
+                num, den = match.group(3).split("/")
+                time_bases[match.group(2)] = int(num) / int(den)
+            elif match and match.group(1) == "media_type":
+                kinds[match.group(2)] = match.group(3)
+            continue
+        fields = [field.strip() for field in line.split(",")]
+        if len(fields) < 4:
+            continue
+        index, pts, packet_duration = fields[0], int(fields[2]), int(fields[3])
+        span = spans.setdefault(index, [pts, pts + packet_duration])
+        span[0] = min(span[0], pts)
+        span[1] = max(span[1], pts + packet_duration)
+
+    durations = {"video": None, "audio": None}
+    for index, (first, last) in spans.items():
+        kind = kinds.get(index)
+        if kind in durations and index in time_bases:
+            durations[kind] = (last - first) * time_bases[index]
+    return durations
+
+
+def _check_concat(
+    project_id: int, manifest: RenderManifest, output_path: str, source_audio: Optional[float] = None
+) -> None:
+    """연결된 결과의 길이와 A/V 싱크를 청크별 길이의 합과 비교합니다.
+
+    청크 자체의 영상/오디오 길이 차이는 원본에서 온 것이므로 제외하고, 연결하며 새로 생긴
+    차이만 검사합니다. 영상만 담은 전체 영상 청크는 원본 오디오 길이(source_audio)를 영상
+    길이까지 붙였을 때를 기대값으로 씁니다. 허용 범위를 넘으면 게시하지 않도록 RuntimeError를 발생시킵니다.
+    """
+    chunk_streams = [chunk.get("streams") or {} for chunk in manifest.chunks]
+    actual = _stream_durations(output_path)
+    expected = {
+        kind: sum(streams[kind] for streams in chunk_streams)
+        if all(streams.get(kind) is not None for streams in chunk_streams) else None
+        for kind in ("video", "audio")
+    }
+    if manifest.video_only:
+        expected["audio"] = (
+            min(source_audio, expected["video"])
+            if source_audio is not None and expected["video"] is not None else None
         )
-        .overwrite_output()
-        .run(quiet=True)
+    # 이음매마다 AAC 프레임(약 21ms) 하나 정도의 오차는 허용
+    tolerance = CONCAT_TOLERANCE_SECONDS + 0.025 * len(chunk_streams)
+    duration_error = (
+        abs(actual["video"] - expected["video"])
+        if actual["video"] is not None and expected["video"] is not None else None
     )
+    sync_error = None
+    if None not in (actual["video"], actual["audio"], expected["video"], expected["audio"]):
+        sync_error = abs((actual["audio"] - actual["video"]) - (expected["audio"] - expected["video"]))
+    log_event(
+        "render_concat_check",
+        project_id,
+        chunks=len(chunk_streams),
+        video=actual["video"],
+        audio=actual["audio"],
+        expected_video=expected["video"],
+        expected_audio=expected["audio"],
+        duration_error=duration_error,
+        sync_error=sync_error,
+    )
+    if duration_error is not None and duration_error > tolerance:
+        raise RuntimeError(
+            f"연결된 결과 길이가 맞지 않습니다 ({actual['video']:.3f}s, 예상 {expected['video']:.3f}s)"
+        )
+    if sync_error is not None and sync_error > tolerance:
+        raise RuntimeError(f"연결된 결과의 오디오/영상 싱크가 {sync_error:.3f}s 어긋났습니다")
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _publish_output(db: Session, project_id: int, render_id: int, output_path: str, hls: bool) -> str:
+    """렌더링 결과를 outputs/<id>/<내용 해시>/final.mp4로 옮기고 경로를 반환합니다.
+
+    같은 URL의 내용이 바뀌지 않으므로 브라우저/CDN이 immutable로 캐시할 수 있습니다.
+    """
+    import ffmpeg
+
+    publish_dir = os.path.join(os.path.dirname(output_path), _file_digest(output_path))
+    already_published = os.path.isdir(publish_dir)
+    os.makedirs(publish_dir, exist_ok=True)
+    published_path = os.path.join(publish_dir, "final.mp4")
+    os.replace(output_path, published_path)
+
+    if hls:
+        hls_dir = os.path.join(publish_dir, "hls")
+        os.makedirs(hls_dir, exist_ok=True)
+        with timed("hls_package", project_id):
+            try:
+                stats = run_ffmpeg(
+                    ffmpeg
+                    .input(published_path)
+                    .output(
+                        os.path.join(hls_dir, "index.m3u8"),
+                        c="copy",
+                        f="hls",
+                        hls_time=HLS_SEGMENT_SECONDS,
+                        hls_playlist_type="vod",
+                        hls_segment_type="fmp4",
+                        hls_fmp4_init_filename="init.mp4",
+                        hls_segment_filename=os.path.join(hls_dir, "seg_%03d.m4s"),
+                    )
+                    .overwrite_output(),
+                    kind="hls",
+                )
+            except BaseException:
+                # 실패·취소 모두 반쯤 만든 패키지를 남기지 않습니다. 같은 내용이 이미 게시돼 있으면
+                # 그 final.mp4는 제공 중일 수 있으므로 HLS 디렉터리만 지웁니다.
+                shutil.rmtree(hls_dir if already_published else publish_dir, ignore_errors=True)
+                raise
+        save_encode_stat(db, project_id, stats, render_id)
+
+    return published_path
+
+
+def _remove_superseded_outputs(project_id: int, published_path: str) -> None:
+    """새 결과가 게시된 뒤 같은 프로젝트의 이전 내용 해시 디렉터리(final.mp4, HLS)를 지웁니다."""
+    publish_dir = os.path.dirname(published_path)
+    project_dir = os.path.dirname(publish_dir)
+    for name in os.listdir(project_dir):
+        path = os.path.join(project_dir, name)
+        if path != publish_dir and _PUBLISH_DIR_NAME.fullmatch(name) and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            log_event("output_superseded", project_id, path=path)
+
+
+def _hls_path(output_path: Optional[str]) -> Optional[str]:
+    if not output_path:
+        return None
+    return os.path.join(os.path.dirname(output_path), "hls", "index.m3u8")
+
+
+def _referenced_outputs() -> list[str]:
+    """프로젝트가 현재 제공 중인 게시 디렉터리(final.mp4와 HLS 패키지) 목록.
+
+    용량 한도 정리에서 제외해, 상태가 "done"인 프로젝트가 지워진 URL을 내주지 않게 합니다.
+    """
+    db = SessionLocal()
+    try:
+        paths = db.scalars(select(Project.output_path).where(Project.output_path.isnot(None))).all()
+    finally:
+        db.close()
+    return [os.path.dirname(path) for path in paths]
+
+
+media_cache.protect("outputs", _referenced_outputs)
+
+
+def _output_path(project_id: int) -> str:
+    return os.path.join(MEDIA_BASE_PATH, "outputs", str(project_id), "final.mp4")
+
+
+def _plan_render(db: Session, project_id: int, source_path: str, highlight_ids: Optional[List[int]]) -> list[dict]:
+    """하이라이트 구간마다 한 청크를, 하이라이트가 없으면 전체 영상을 키프레임에 맞춘 시간 청크로 계획합니다."""
+    highlights: list = []
+    if highlight_ids:
+        highlights = (
+            db.query(Highlight)
+            .filter(
+                Highlight.project_id == project_id,
+                Highlight.id.in_(highlight_ids),
+            )
+            .order_by(Highlight.start_time)
+            .all()
+        )
+
+    if highlights:
+        return plan_chunks([(hl.start_time, hl.end_time - hl.start_time) for hl in highlights], "segment")
+
+    # 길이를 모르면(프로브 실패, 분석 결과 없음) 끝까지 한 청크로 인코딩
+    duration = probe_streams(source_path)["duration"] or (load_meta(project_id) or {}).get("duration")
+    keyframes = _keyframe_times(source_path) if duration and duration > RENDER_CHUNK_SECONDS else []
+    return plan_chunks(plan_time_chunks(duration, keyframes), "full")
+
+
+def _concat_chunks(
+    db: Session, project_id: int, render_id: int, manifest: RenderManifest, output_path: str, source_path: str
+) -> None:
+    """완료된 청크들을 연결해 output_path를 만들고 길이/싱크를 검사합니다.
+
+    하이라이트 구간 청크는 stream copy로 연결합니다. 영상만 담은 전체 영상 청크는 영상을
+    stream copy로 연결하면서 원본 오디오를 한 번에 AAC로 인코딩해 붙이므로, 청크 이음매에
+    오디오 프라이밍 간격이 생기지 않습니다.
+    """
+    import ffmpeg
+
+    chunk_files = [manifest.chunk_path(chunk) for chunk in manifest.chunks]
+    if len(chunk_files) == 1 and not manifest.video_only:
+        shutil.move(chunk_files[0], output_path)
+        return
+
+    # concat demuxer로 청크 연결
+    concat_list = os.path.join(manifest.directory, "concat.txt")
+    with open(concat_list, "w") as f:
+        for chunk_file in chunk_files:
+            f.write(f"file '{os.path.abspath(chunk_file)}'\n")
+
+    source_audio = None
+    joined = ffmpeg.input(concat_list, format="concat", safe=0)
+    if manifest.video_only:
+        source_audio = _stream_durations(source_path)["audio"]
+        streams = [joined.video]
+        if source_audio is not None:
+            # -shortest는 오디오가 짧을 때 영상 끝 프레임을 자르므로, 오디오 쪽만 영상 길이로 제한
+            video_seconds = sum((chunk.get("streams") or {}).get("video") or 0.0 for chunk in manifest.chunks)
+            audio_args = {"t": round(video_seconds, 6)} if video_seconds else {}
+            streams.append(ffmpeg.input(source_path, **audio_args).audio)
+        output = ffmpeg.output(*streams, output_path, vcodec="copy", acodec="aac", movflags="+faststart")
+    else:
+        output = joined.output(output_path, c="copy", movflags="+faststart")
+
+    with timed("concat", project_id, segments=len(chunk_files), audio_mux=manifest.video_only):
+        stats = run_ffmpeg(output.overwrite_output(), kind="concat")
+    save_encode_stat(db, project_id, stats, render_id)
+    _check_concat(project_id, manifest, output_path, source_audio)
 
 
 def _render_video(
@@ -111,130 +454,200 @@ def _render_video(
     output_path: str,
     subtitles: list,
     highlight_ids: Optional[List[int]] = None,
+    hls: bool = False,
+    smart_crop: bool = True,
+    render_id: Optional[int] = None,
+    lock: Optional[JobLock] = None,
 ) -> None:
     """FFmpeg로 자막을 번인하고 9:16 숏폼으로 렌더링합니다.
 
     highlight_ids가 있으면 해당 하이라이트 구간만 추출·연결하여 렌더링합니다.
+    하이라이트 구간 또는 키프레임에 맞춘 전체 영상의 시간 청크를 segments/<id>/render_<render_id>/에
+    하나씩 인코딩하고 완료할 때마다 매니페스트에 기록하므로, render_id를 주면 중단된 렌더링을
+    마지막 완료 청크 다음부터 이어서 진행합니다 (자막/HLS/스마트 크롭 옵션은 매니페스트 기준).
+    전체 영상 청크는 영상만 인코딩하고 오디오는 연결할 때 원본에서 한 번에 인코딩해 붙입니다.
+    lock은 재개하는 쪽이 미리 얻어 둔 작업 디렉터리 잠금이며, 없으면 여기서 얻습니다.
+    smart_crop이 True이면 화자/움직임을 따라가는 크롭 경로(원본별 캐시)로 9:16을 잘라냅니다.
+    완료된 파일은 내용 해시 디렉터리로 옮겨 변경 불가능한 URL로 제공하며,
+    hls가 True이면 같은 디렉터리에 HLS(fMP4) 패키지도 생성합니다.
     """
-    import ffmpeg
-
     db = SessionLocal()
     project = None
+    render_job = None
+    previous_status = None
+    checkpoint_dir = None
+    settled = False
+    output_dir = os.path.dirname(output_path)
+    job = job_registry.begin(project_id, "render")
+    media_cache.acquire(source_dir(project_id), output_dir)
     try:
+        job.check()
         project = db.query(Project).filter(Project.id == project_id).first()
         if not project:
+            settled = True
             return
 
-        project.status = "rendering"
-        db.commit()
+        if render_id is None:
+            previous_status = project.status
+            project.status = "rendering"
+            render_job = RenderJob(
+                project_id=project_id,
+                highlight_ids_json=json.dumps(highlight_ids) if highlight_ids else None,
+            )
+            db.add(render_job)
+            # 커밋해 다른 프로세스에 "rendering"으로 보이기 전에 작업 디렉터리 잠금을 쥡니다.
+            db.flush()
+            lock = JobLock(job_dir(project_id, render_job.id))
+            lock.acquire()
+            db.commit()
+        else:
+            render_job = db.get(RenderJob, render_id)
+            previous_status = "done" if project.output_path and os.path.exists(project.output_path) else "ready"
+            if lock is None:
+                lock = JobLock(job_dir(project_id, render_job.id))
+                if not lock.acquire():
+                    # 다른 서버 프로세스가 이미 이 렌더링을 이어받아 진행 중
+                    log_event("render_resume_skipped", project_id, render_id=render_id, reason="locked")
+                    lock = None
+                    settled = True
+                    return
+
+        checkpoint_dir = job_dir(project_id, render_job.id)
+        media_cache.acquire(checkpoint_dir)
 
         _render_progress[project_id] = {"progress": 0, "stage": "준비 중"}
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        highlights: list = []
-        if highlight_ids:
-            highlights = (
-                db.query(Highlight)
-                .filter(
-                    Highlight.project_id == project_id,
-                    Highlight.id.in_(highlight_ids),
-                )
-                .order_by(Highlight.start_time)
-                .all()
+        os.makedirs(output_dir, exist_ok=True)
+        source_path = ensure_source(db, project)
+
+        manifest = RenderManifest.load(checkpoint_dir, source_path) if render_id is not None else None
+        if manifest is None:
+            chunks = _plan_render(db, project_id, source_path, highlight_ids)
+            manifest = RenderManifest.create(
+                checkpoint_dir, render_job.id, source_path, chunks, subtitles, hls, smart_crop, previous_status
             )
-
-        if highlights:
-            # ── 하이라이트 구간별 렌더링 후 연결 ──
-            _render_progress[project_id] = {"progress": 5, "stage": "구간 추출 중"}
-            temp_dir = tempfile.mkdtemp()
-            segment_files: list[str] = []
-
-            try:
-                for i, hl in enumerate(highlights):
-                    seg_path = os.path.join(temp_dir, f"seg_{i:03d}.mp4")
-                    seg_duration = hl.end_time - hl.start_time
-
-                    # 이 구간에 해당하는 자막 필터링
-                    seg_subs = [
-                        s for s in subtitles
-                        if s.end_time > hl.start_time and s.start_time < hl.end_time
-                    ]
-
-                    _render_segment(
-                        source_path=source_path,
-                        output_path=seg_path,
-                        start=hl.start_time,
-                        duration=seg_duration,
-                        subtitles=seg_subs,
-                        time_offset=hl.start_time,
-                    )
-                    segment_files.append(seg_path)
-
-                    progress = 5 + int((i + 1) / len(highlights) * 75)
-                    _render_progress[project_id] = {
-                        "progress": progress,
-                        "stage": f"구간 {i + 1}/{len(highlights)} 렌더링 중",
-                    }
-
-                if len(segment_files) == 1:
-                    shutil.move(segment_files[0], output_path)
-                else:
-                    # concat demuxer로 세그먼트 연결
-                    _render_progress[project_id] = {"progress": 83, "stage": "구간 연결 중"}
-                    concat_list = os.path.join(temp_dir, "concat.txt")
-                    with open(concat_list, "w") as f:
-                        for seg in segment_files:
-                            f.write(f"file '{seg}'\n")
-
-                    (
-                        ffmpeg
-                        .input(concat_list, format="concat", safe=0)
-                        .output(output_path, c="copy")
-                        .overwrite_output()
-                        .run(quiet=True)
-                    )
-            finally:
-                shutil.rmtree(temp_dir, ignore_errors=True)
-
         else:
-            # ── 전체 영상 렌더링 ──
-            _render_progress[project_id] = {"progress": 10, "stage": "인코딩 중"}
-
-            drawtext_filters = _build_drawtext_filters(subtitles)
-            crop_and_scale = "crop=ih*9/16:ih,scale=1080:1920"
-
-            if drawtext_filters:
-                vf_full = crop_and_scale + "," + ",".join(drawtext_filters)
-            else:
-                vf_full = crop_and_scale
+            subtitles = subtitles_from_dicts(manifest.data["subtitles"])
+            hls = manifest.data["hls"]
+            # 스마트 크롭 이전에 만든 매니페스트는 이미 인코딩한 청크와 같은 중앙 크롭으로 이어갑니다.
+            smart_crop = manifest.data.get("smart_crop", False)
+            previous_status = manifest.data["previous_status"] or previous_status
+            log_event(
+                "render_resume",
+                project_id,
+                render_id=render_job.id,
+                chunks=len(manifest.chunks),
+                done=len(manifest.chunks) - len(manifest.pending()),
+            )
 
-            (
-                ffmpeg
-                .input(source_path)
-                .output(
-                    output_path,
-                    vf=vf_full,
-                    acodec="aac",
-                    vcodec="libx264",
-                    crf=23,
-                    preset="fast",
-                )
-                .overwrite_output()
-                .run(quiet=True)
+        crop_path = None
+        if smart_crop:
+            crop_path = reframe.load_reframe(project_id, source_path)
+            if crop_path is None and manifest.pending():
+                _render_progress[project_id] = {"progress": 2, "stage": "리프레이밍 분석 중"}
+                # 하이라이트 렌더링은 남은 구간만 분석하고, 전체 렌더링만 원본 전체를 분석해 캐시합니다.
+                ranges = None
+                if not manifest.video_only:
+                    ranges = [(chunk["start"], chunk["duration"]) for chunk in manifest.pending()]
+                try:
+                    crop_path = reframe.analyze_reframe(project_id, source_path, ranges)
+                    save_encode_stat(db, project_id, crop_path["cost"], render_job.id)
+                    db.commit()
+                except JobCancelled:
+                    raise
+                except Exception as e:
+                    # 분석에 실패하면 중앙 크롭으로 렌더링을 계속합니다.
+                    log_event("reframe_fallback", project_id, render_id=render_job.id, error=str(e)[:300])
+
+        # ── 청크별 렌더링 (완료된 청크는 건너뜀) ──
+        total = len(manifest.chunks)
+        for i, chunk in enumerate(manifest.chunks):
+            if chunk["done"]:
+                continue
+            job.check()
+            _render_progress[project_id] = {
+                "progress": 5 + int(i / total * 75),
+                "stage": f"구간 {i + 1}/{total} 렌더링 중",
+            }
+
+            chunk_start = chunk["start"]
+            chunk_end = chunk_start + chunk["duration"] if chunk["duration"] is not None else float("inf")
+            # 이 청크에 해당하는 자막 필터링
+            chunk_subs = [s for s in subtitles if s.end_time > chunk_start and s.start_time < chunk_end]
+
+            part_path = manifest.part_path(chunk)
+            stats = _render_segment(
+                source_path=source_path,
+                output_path=part_path,
+                start=chunk_start,
+                duration=chunk["duration"],
+                subtitles=chunk_subs,
+                time_offset=chunk_start,
+                project_id=project_id,
+                hls=hls,
+                kind=chunk["kind"],
+                crop_path=crop_path,
+                audio=not manifest.video_only,
             )
+            chunk_path = manifest.chunk_path(chunk)
+            os.replace(part_path, chunk_path)
+            save_encode_stat(db, project_id, stats, render_job.id)
+            db.commit()
+            manifest.mark_done(chunk, _stream_durations(chunk_path))
+            # 진행 중인 작업의 청크는 pin되어 있으므로 중단된 다른 작업의 청크부터 정리됩니다.
+            media_cache.enforce("segments")
+
+        job.check()
+        _render_progress[project_id] = {"progress": 83, "stage": "구간 연결 중"}
+        _concat_chunks(db, project_id, render_job.id, manifest, output_path, source_path)
+
+        job.check()
+        _render_progress[project_id] = {"progress": 95, "stage": "게시 중"}
+        published_path = _publish_output(db, project_id, render_job.id, output_path, hls)
 
         _render_progress[project_id] = {"progress": 100, "stage": "완료"}
-        project.output_path = output_path
+        project.output_path = published_path
         project.status = "done"
+        render_job.status = "done"
+        render_job.output_path = published_path
+        render_job.finished_at = datetime.now(timezone.utc)
         db.commit()
-
+        settled = True
+
+        # 프로젝트가 새 경로를 가리키게 된 뒤에 이전 결과를 정리
+        _remove_superseded_outputs(project_id, published_path)
+        media_cache.enforce("outputs")
+
+    except JobCancelled:
+        settled = True
+        # 부분 출력 파일을 지우고 렌더링 이전 상태로 되돌립니다.
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        _render_progress[project_id] = {"progress": 0, "stage": "취소됨"}
+        db.rollback()
+        project = db.query(Project).filter(Project.id == project_id).first()
+        if project and previous_status is not None:
+            project.status = previous_status
+            if render_job:
+                render_job.status = "cancelled"
+                render_job.finished_at = datetime.now(timezone.utc)
+            try:
+                db.commit()
+            except Exception:
+                pass
+        print(f"[render] 렌더링 취소 (project_id={project_id})")
     except Exception as e:
+        settled = True
         _render_progress[project_id] = {
             "progress": -1,
             "stage": f"오류: {str(e)[:120]}",
         }
         if project:
             project.status = "error"
+            if render_job:
+                render_job.status = "error"
+                render_job.finished_at = datetime.now(timezone.utc)
+                if isinstance(e, FFmpegRunError):
+                    save_encode_stat(db, project_id, e.stats, render_job.id)
             try:
                 db.commit()
             except Exception:
@@ -242,6 +655,102 @@ def _render_video(
         print(f"[render] 렌더링 오류 (project_id={project_id}): {e}")
     finally:
         db.close()
+        # 잠금 파일을 지우기 전에 풀어야 Windows에서도 작업 디렉터리를 지울 수 있습니다.
+        if lock is not None:
+            lock.release()
+        if checkpoint_dir:
+            media_cache.release(checkpoint_dir)
+            # 결과가 확정된 경우에만 체크포인트를 지웁니다. 프로세스가 죽으면 남아 재개에 쓰입니다.
+            if settled:
+                remove_job_dir(checkpoint_dir)
+        media_cache.release(source_dir(project_id), output_dir)
+        job_registry.end(job)
+
+
+def _abandon_stale_renders(db: Session, project_id: int) -> None:
+    """재개되지 못하고 "rendering"으로 남은 렌더링 이력을 오류로 정리합니다."""
+    stale = (
+        db.query(RenderJob)
+        .filter(RenderJob.project_id == project_id, RenderJob.status == "rendering")
+        .all()
+    )
+    for render_job in stale:
+        render_job.status = "error"
+        render_job.finished_at = datetime.now(timezone.utc)
+        remove_job_dir(job_dir(project_id, render_job.id))
+    db.commit()
+
+
+def resume_interrupted_renders() -> list[int]:
+    """서버 시작 시 "rendering"으로 남은 프로젝트의 렌더링을 체크포인트부터 재개합니다.
+
+    작업 디렉터리 잠금을 얻은 렌더링만 재개하므로, 여러 서버 프로세스가 동시에 시작하거나
+    다른 프로세스가 렌더링 중이어도 같은 렌더링을 두 번 실행하지 않습니다. 잠금을 얻지 못한
+    (살아 있는 프로세스가 진행 중인) 렌더링과 그 작업 디렉터리는 그대로 둡니다.
+    재개한 프로젝트 ID 목록을 반환합니다.
+    """
+    db = SessionLocal()
+    resumed: list[tuple] = []
+    live_ids: list[int] = []
+    try:
+        for project in db.query(Project).filter(Project.status == "rendering").all():
+            render_job = (
+                db.query(RenderJob)
+                .filter(RenderJob.project_id == project.id, RenderJob.status == "rendering")
+                .order_by(RenderJob.started_at.desc(), RenderJob.id.desc())
+                .first()
+            )
+            if render_job is not None and is_locked(job_dir(project.id, render_job.id)):
+                live_ids.append(render_job.id)
+                continue
+            if render_job is None or not source_available(project):
+                _abandon_stale_renders(db, project.id)
+                project.status = (
+                    "done" if project.output_path and os.path.exists(project.output_path) else "ready"
+                )
+                db.commit()
+                continue
+
+            lock = JobLock(job_dir(project.id, render_job.id))
+            if not lock.acquire():
+                # 확인한 직후 다른 프로세스가 먼저 잠금을 얻음
+                live_ids.append(render_job.id)
+                continue
+
+            highlight_ids = json.loads(render_job.highlight_ids_json) if render_job.highlight_ids_json else None
+            # 매니페스트가 없을 때만 쓰이는 대체 자막 (매니페스트가 있으면 렌더링 시작 시점의 자막 사용)
+            subtitles = (
+                db.query(Subtitle)
+                .filter(Subtitle.project_id == project.id)
+                .order_by(Subtitle.start_time)
+                .all()
+            )
+            resumed.append(
+                (project.id, project.source_path, subtitles_to_dicts(subtitles), highlight_ids, render_job.id, lock)
+            )
+
+        # 프로젝트당 최신 이력만 재개하고 나머지 중단된 이력은 오류로 정리
+        keep_ids = [render_id for *_, render_id, _lock in resumed] + live_ids
+        stale = db.query(RenderJob).filter(RenderJob.status == "rendering", RenderJob.id.notin_(keep_ids))
+        stale.update({"status": "error", "finished_at": datetime.now(timezone.utc)}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+    cleanup_segments({job_dir(project_id, render_id) for project_id, *_, render_id, _lock in resumed})
+
+    for project_id, source_path, subtitles, highlight_ids, render_id, lock in resumed:
+        job_registry.submit(project_id, "render")
+        threading.Thread(
+            target=_render_video,
+            args=(project_id, source_path, _output_path(project_id), subtitles_from_dicts(subtitles), highlight_ids),
+            kwargs={"render_id": render_id, "lock": lock},
+            name=f"render-resume-{project_id}",
+            daemon=True,
+        ).start()
+        print(f"[render] 중단된 렌더링 재개 (project_id={project_id}, render_id={render_id})")
+
+    return [project_id for project_id, *_ in resumed]
 
 
 @router.post("/{project_id}/render")
@@ -256,21 +765,32 @@ def render_video(
     if not project:
         raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
 
-    if not project.source_path or not os.path.exists(project.source_path):
+    if not source_available(project):
         raise HTTPException(status_code=400, detail="다운로드된 영상 파일이 없습니다.")
 
-    if project.status == "rendering":
-        raise HTTPException(status_code=409, detail="이미 렌더링 중입니다.")
+    subtitles = []
+    if payload.include_subtitles:
+        subtitles = (
+            db.query(Subtitle)
+            .filter(Subtitle.project_id == project_id)
+            .order_by(Subtitle.start_time)
+            .all()
+        )
 
-    subtitles = (
-        db.query(Subtitle)
-        .filter(Subtitle.project_id == project_id)
-        .order_by(Subtitle.start_time)
-        .all()
-    )
+    output_path = _output_path(project_id)
 
-    output_dir = os.path.join(MEDIA_BASE_PATH, "outputs", str(project_id))
-    output_path = os.path.join(output_dir, "final.mp4")
+    # 확인과 등록을 한 번에 해 동시 요청이 같은 렌더를 두 번 시작하지 못하게 합니다.
+    job = job_registry.claim(project_id, "render")
+    if job is None:
+        raise HTTPException(status_code=409, detail="이미 렌더링 중입니다.")
+
+    if project.status == "rendering":
+        # 실행 중인 작업 없이 "rendering"으로 남은 경우(재개 실패 등) 새로 시작할 수 있게 합니다.
+        try:
+            _abandon_stale_renders(db, project_id)
+        except Exception:
+            job_registry.end(job)
+            raise
 
     background_tasks.add_task(
         _render_video,
@@ -279,34 +799,47 @@ def render_video(
         output_path,
         subtitles,
         payload.highlight_ids,
+        payload.hls,
+        payload.smart_crop,
     )
 
+    # 결과 경로는 내용 해시로 정해지므로 완료 후 진행률/프로젝트 조회의 output_url로 제공합니다.
     return {
         "message": "렌더링을 시작했습니다.",
         "project_id": project_id,
-        "output_path": output_path,
+        "progress_url": f"/projects/{project_id}/render/progress",
     }
 
 
+@router.post("/{project_id}/render/cancel")
+async def cancel_render(project: Project = Depends(get_project)):
+    """진행 중인 렌더링을 취소합니다. ffmpeg를 종료하고 임시/부분 파일을 정리합니다."""
+    results = await run_in_threadpool(job_registry.cancel, project.id, "render", CANCEL_WAIT_SECONDS)
+    if not results:
+        raise HTTPException(status_code=409, detail="진행 중인 렌더링이 없습니다.")
+    return {"message": "렌더링을 취소했습니다.", "project_id": project.id, **results[0]}
+
+
 @router.get("/{project_id}/render/progress", response_model=RenderProgressResponse)
-def get_render_progress(project_id: int, db: Session = Depends(get_db)):
+async def get_render_progress(project: Project = Depends(get_project)):
     """렌더링 진행률을 반환합니다."""
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="프로젝트를 찾을 수 없습니다.")
-
-    info = _render_progress.get(project_id, {})
+    info = _render_progress.get(project.id, {})
 
     output_url: Optional[str] = None
-    if project.output_path and os.path.exists(project.output_path):
-        output_url = f"/media/outputs/{project_id}/final.mp4"
+    hls_url: Optional[str] = None
+    if await path_exists(project.output_path):
+        output_url = media_cache.url_for(project.output_path)
+        hls_path = _hls_path(project.output_path)
+        if await path_exists(hls_path):
+            hls_url = media_cache.url_for(hls_path)
 
     return RenderProgressResponse(
-        project_id=project_id,
+        project_id=project.id,
         status=project.status,
         progress=info.get("progress", 0),
         stage=info.get("stage", ""),
         output_url=output_url,
+        hls_url=hls_url,
     )
 
 
@@ -326,9 +859,33 @@ def download_output(project_id: int, db: Session = Depends(get_db)):
             detail=f"출력 파일을 찾을 수 없습니다: {project.output_path}",
         )
 
+    media_cache.touch(project.output_path)
     filename = f"alphacut_{project_id}_final.mp4"
     return FileResponse(
         path=project.output_path,
         media_type="video/mp4",
         filename=filename,
     )
+
+
+@router.get("/{project_id}/renders", response_model=List[RenderJobResponse])
+async def list_renders(project: Project = Depends(get_project), db: AsyncSession = Depends(get_async_db)):
+    """렌더링 이력과 구간별 ffmpeg 인코딩 통계를 최신순으로 반환합니다."""
+    result = await db.scalars(
+        select(RenderJob)
+        .where(RenderJob.project_id == project.id)
+        .options(selectinload(RenderJob.encode_stats))
+        .order_by(RenderJob.started_at.desc())
+    )
+    return result.all()
+
+
+@router.get("/{project_id}/encode-stats", response_model=List[EncodeStatResponse])
+async def list_encode_stats(project: Project = Depends(get_project), db: AsyncSession = Depends(get_async_db)):
+    """오디오 추출을 포함한 모든 ffmpeg 실행 통계를 최신순으로 반환합니다."""
+    result = await db.scalars(
+        select(EncodeStat)
+        .where(EncodeStat.project_id == project.id)
+        .order_by(EncodeStat.created_at.desc())
+    )
+    return result.all()
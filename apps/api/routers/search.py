@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from database import get_db
+from schemas import SearchResponse
+from search_index import search_subtitles
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=SearchResponse)
+def search_transcripts(
+    q: str = Query(..., min_length=1, description="검색어 (공백으로 구분된 단어는 AND)"),
+    project_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    window: float = Query(45.0, ge=5, le=120, description="하이라이트 후보 구간 길이(초)"),
+    db: Session = Depends(get_db),
+):
+    """전체 프로젝트 자막에서 검색어를 찾아 관련도 순으로 반환합니다.
+
+    각 결과의 candidate는 해당 발화를 포함하는 하이라이트 후보 구간입니다.
+    """
+    query = q.strip()
+    if not query:
+        raise HTTPException(status_code=400, detail="검색어를 입력하세요.")
+
+    hits, has_more = search_subtitles(db, query, limit=limit, offset=offset, project_id=project_id)
+
+    for hit in hits:
+        start = max(0.0, hit["start_time"] - window / 3)
+        hit["candidate"] = {
+            "title": hit["text"][:30],
+            "start_time": round(start, 3),
+            "end_time": round(max(start + window, hit["end_time"]), 3),
+            "reason": f"검색어 '{query}' 포함 발화",
+        }
+
+    return {"query": query, "limit": limit, "offset": offset, "has_more": has_more, "hits": hits}
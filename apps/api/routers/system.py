@@ -0,0 +1,39 @@
+from fastapi import APIRouter
+
+from scheduler import encode_scheduler
+from media_cache import media_cache
+from jobs import job_registry
+from revisions import response_cache
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get("/scheduler")
+def get_scheduler_stats():
+    """인코더 스케줄러의 대기열 깊이와 스레드 사용률을 반환합니다."""
+    return encode_scheduler.stats()
+
+
+@router.get("/jobs")
+def get_jobs():
+    """실행 중이거나 대기 중인 취소 가능한 작업 목록을 반환합니다."""
+    return {"jobs": job_registry.active()}
+
+
+@router.get("/media")
+def get_media_usage():
+    """미디어 캐시 클래스별 사용량과 용량 한도를 반환합니다."""
+    return media_cache.report()
+
+
+@router.post("/media/evict")
+def evict_media():
+    """용량 한도를 넘은 클래스에서 LRU 정리를 즉시 실행합니다."""
+    evicted = media_cache.enforce_all()
+    return {"evicted": evicted, "count": sum(len(paths) for paths in evicted.values())}
+
+
+@router.get("/response-cache")
+def get_response_cache():
+    """프로젝트/자막/하이라이트 직렬화 응답 캐시의 사용량을 반환합니다."""
+    return response_cache.report()
@@ -0,0 +1,136 @@
+import os
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+from metrics import QUEUE_WAIT_SECONDS
+from jobs import current_job, JobCancelled
+
+load_dotenv()
+
+# 전체 인코더 스레드 예산 (기본값: CPU 코어 수)
+ENCODER_THREADS = int(os.getenv("ENCODER_THREADS") or 0) or (os.cpu_count() or 1)
+
+# 작업 종류별 우선순위 (낮을수록 먼저 실행). 짧은 작업을 긴 풀 인코딩보다 우선합니다.
+JOB_PRIORITY: dict[str, int] = {
+    "audio": 0,    # 오디오 추출 (STT 전처리)
+    "draft": 1,    # 저해상도/미리보기 렌더
+    "segment": 2,  # 하이라이트 구간 인코딩
+    "full": 3,     # 전체 영상 인코딩
+}
+
+
+def _default_job_threads(kind: str, total: int) -> int:
+    """작업 종류별로 할당할 스레드 수를 계산합니다."""
+    if kind == "audio":
+        return 1
+    if kind == "draft":
+        return max(1, total // 4)
+    # 인코딩 작업은 코어의 절반씩 나눠 동시에 2개까지 돌도록 합니다.
+    return max(1, total // 2)
+
+
+class EncodeScheduler:
+    """프로세스 전역 FFmpeg 스레드 스케줄러.
+
+    각 작업은 스레드 예산이 남아 있을 때만 시작되며, 대기열은
+    (작업 우선순위, 예상 길이, 도착 순서) 순으로 정렬됩니다.
+    """
+
+    def __init__(self, total_threads: int = ENCODER_THREADS):
+        self.total_threads = max(1, total_threads)
+        self._cond = threading.Condition()
+        self._waiting: list[tuple] = []
+        self._running: dict[int, dict] = {}
+        self._in_use = 0
+        self._seq = itertools.count()
+
+    def threads_for(self, kind: str) -> int:
+        return min(self.total_threads, _default_job_threads(kind, self.total_threads))
+
+    @contextmanager
+    def slot(self, kind: str, estimated_seconds: float = 0.0, label: str = ""):
+        """스레드 예산을 확보할 때까지 대기한 뒤 할당된 스레드 수를 돌려줍니다.
+
+        현재 작업이 대기 중에 취소되면 대기열에서 빠지고 JobCancelled를 발생시킵니다.
+        """
+        threads = self.threads_for(kind)
+        ticket = next(self._seq)
+        entry = (JOB_PRIORITY.get(kind, len(JOB_PRIORITY)), estimated_seconds, ticket, kind)
+        queued_at = time.monotonic()
+        job = current_job()
+
+        def wake():
+            with self._cond:
+                self._cond.notify_all()
+
+        if job is not None:
+            job.check()
+            job.on_cancel(wake)
+        try:
+            with self._cond:
+                heapq.heappush(self._waiting, entry)
+                while self._waiting[0] is not entry or self._in_use + threads > self.total_threads:
+                    if job is not None and job.cancelled:
+                        self._waiting.remove(entry)
+                        heapq.heapify(self._waiting)
+                        self._cond.notify_all()
+                        raise JobCancelled(f"{kind} 작업이 대기 중 취소되었습니다.")
+                    self._cond.wait()
+                heapq.heappop(self._waiting)
+                self._in_use += threads
+                queue_wait = time.monotonic() - queued_at
+                QUEUE_WAIT_SECONDS.labels(kind=kind).observe(queue_wait)
+                self._running[ticket] = {
+                    "kind": kind,
+                    "label": label,
+                    "threads": threads,
+                    "estimated_seconds": estimated_seconds,
+                    "queue_wait": queue_wait,
+                    "started_at": time.monotonic(),
+                }
+                # 다음 대기 작업도 남은 예산에 들어갈 수 있으면 바로 시작하도록 깨웁니다.
+                self._cond.notify_all()
+        finally:
+            if job is not None:
+                job.remove_callback(wake)
+
+        try:
+            yield threads
+        finally:
+            with self._cond:
+                self._in_use -= threads
+                self._running.pop(ticket, None)
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """대기열 깊이와 스레드 사용률을 반환합니다."""
+        with self._cond:
+            now = time.monotonic()
+            waiting_by_kind: dict[str, int] = {}
+            for entry in self._waiting:
+                waiting_by_kind[entry[3]] = waiting_by_kind.get(entry[3], 0) + 1
+            return {
+                "total_threads": self.total_threads,
+                "threads_in_use": self._in_use,
+                "utilisation": round(self._in_use / self.total_threads, 3),
+                "queue_depth": len(self._waiting),
+                "waiting_by_kind": waiting_by_kind,
+                "running": [
+                    {
+                        "kind": job["kind"],
+                        "label": job["label"],
+                        "threads": job["threads"],
+                        "queue_wait": round(job["queue_wait"], 3),
+                        "elapsed": round(now - job["started_at"], 3),
+                    }
+                    for job in self._running.values()
+                ],
+            }
+
+
+encode_scheduler = EncodeScheduler()
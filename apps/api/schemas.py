@@ -16,6 +16,7 @@ class ProjectResponse(BaseModel):
     source_path: Optional[str]
     output_path: Optional[str]
     created_at: datetime
+    output_url: Optional[str] = None  # 렌더링 결과의 내용 해시 URL (/media/outputs/...)
 
     model_config = {"from_attributes": True}
 
@@ -57,6 +58,8 @@ class HighlightResponse(BaseModel):
 class RenderRequest(BaseModel):
     highlight_ids: Optional[List[int]] = None
     include_subtitles: bool = True
+    hls: bool = False  # HLS(fMP4) 패키지도 함께 생성
+    smart_crop: bool = True  # 화자/움직임을 따라가는 9:16 크롭 (False면 중앙 크롭)
 
 
 class RenderProgressResponse(BaseModel):
@@ -65,3 +68,62 @@ class RenderProgressResponse(BaseModel):
     progress: int
     stage: str
     output_url: Optional[str]
+    hls_url: Optional[str] = None
+
+
+class EncodeStatResponse(BaseModel):
+    id: int
+    project_id: int
+    render_id: Optional[int]
+    kind: str
+    frames: Optional[int]
+    fps: Optional[float]
+    speed: Optional[float]
+    bitrate_kbps: Optional[float]
+    out_time: Optional[float]
+    wall_seconds: Optional[float]
+    exit_code: Optional[int]
+    warnings_json: Optional[str]
+    log_tail: Optional[str]
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class RenderJobResponse(BaseModel):
+    id: int
+    project_id: int
+    status: str
+    highlight_ids_json: Optional[str]
+    output_path: Optional[str]
+    started_at: datetime
+    finished_at: Optional[datetime]
+    encode_stats: List[EncodeStatResponse]
+
+    model_config = {"from_attributes": True}
+
+
+class HighlightCandidate(BaseModel):
+    title: str
+    start_time: float
+    end_time: float
+    reason: Optional[str]
+
+
+class SearchHit(BaseModel):
+    subtitle_id: int
+    project_id: int
+    start_time: float
+    end_time: float
+    text: str
+    snippet: str
+    rank: float
+    candidate: HighlightCandidate
+
+
+class SearchResponse(BaseModel):
+    query: str
+    limit: int
+    offset: int
+    has_more: bool
+    hits: List[SearchHit]
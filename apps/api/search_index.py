@@ -0,0 +1,255 @@
+"""자막 전문 검색 인덱스 (SQLite FTS5).
+
+`subtitles_fts` 가상 테이블은 subtitles 테이블의 트리거로 갱신되므로
+STT 저장, 자막 편집(PUT), 프로젝트 삭제 시 별도 코드 없이 증분 반영됩니다.
+한국어 부분 일치를 위해 trigram 토크나이저를 사용합니다. 한국어 단어는 대부분
+2음절이라 trigram으로는 바로 찾을 수 없으므로, 2글자 검색어는 `subtitles_fts_vocab`
+(fts5vocab)에서 그 글자로 시작하는 trigram을 범위 조회해 OR 조건으로 확장합니다.
+문장 끝의 2글자도 trigram이 생기도록 인덱스에는 본문 뒤에 공백을 붙여 넣습니다.
+1글자 검색어만 있으면 LIKE로 처리하며, 프로젝트를 지정하면 subtitles.project_id
+인덱스로 범위를 좁힙니다. SQLite가 아닌 DB에서는 LIKE 검색으로 대체합니다.
+"""
+
+import re
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from metrics import log_event
+from models import Subtitle
+
+FTS_TABLE = "subtitles_fts"
+VOCAB_TABLE = "subtitles_fts_vocab"
+# 인덱스 형식이 바뀌면 올려서 기존 DB의 인덱스를 다시 만듭니다.
+INDEX_VERSION = 2
+_MIN_TRIGRAM_TERM = 3
+# 2글자 검색어 하나가 확장될 수 있는 최대 trigram 수 (넘으면 LIKE로 처리)
+MAX_PREFIX_EXPANSION = 2000
+
+# init_search_index가 실제 생성된 토크나이저로 갱신합니다.
+_tokenizer = "trigram"
+
+_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS subtitles_fts_ai AFTER INSERT ON subtitles BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text || ' ');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS subtitles_fts_ad AFTER DELETE ON subtitles BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS subtitles_fts_au AFTER UPDATE OF text ON subtitles BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text || ' ');
+    END
+    """,
+]
+
+
+def _is_sqlite(bind) -> bool:
+    return bind.dialect.name == "sqlite"
+
+
+def _create_index(conn) -> None:
+    """이전 형식의 인덱스/트리거를 지우고 FTS5 테이블을 새로 만들어 기존 자막을 채웁니다."""
+    for name in ("subtitles_fts_ai", "subtitles_fts_ad", "subtitles_fts_au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {VOCAB_TABLE}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    try:
+        conn.execute(text(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(text, tokenize='trigram')"))
+    except OperationalError:
+        # trigram 미지원(SQLite < 3.34) 환경
+        conn.execute(text(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(text)"))
+    conn.execute(text(f"INSERT INTO {FTS_TABLE}(rowid, text) SELECT id, text || ' ' FROM subtitles"))
+
+
+def init_search_index(engine) -> None:
+    """FTS5 테이블과 동기화 트리거를 만들고, 새로 만든 경우 기존 자막을 채웁니다."""
+    global _tokenizer
+    if not _is_sqlite(engine):
+        return
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS search_index_meta (name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        ))
+        version = conn.execute(
+            text("SELECT version FROM search_index_meta WHERE name = :name"), {"name": FTS_TABLE}
+        ).scalar()
+        if version != INDEX_VERSION:
+            _create_index(conn)
+            conn.execute(
+                text("INSERT OR REPLACE INTO search_index_meta(name, version) VALUES (:name, :version)"),
+                {"name": FTS_TABLE, "version": INDEX_VERSION},
+            )
+
+        conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, 'row')"))
+        for trigger in _TRIGGERS:
+            conn.execute(text(trigger))
+
+        # 기존 DB에는 create_all이 인덱스를 추가하지 않으므로 직접 생성
+        # (자막 교체 시 project_id 기준 삭제와 프로젝트 범위 검색이 전체 스캔되지 않도록)
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_subtitles_project_id ON subtitles (project_id)"))
+
+        sql = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).scalar()
+    _tokenizer = "trigram" if "trigram" in (sql or "") else "unicode61"
+    if _tokenizer != "trigram":
+        log_event(
+            "search_index_fallback",
+            tokenizer=_tokenizer,
+            detail="SQLite trigram 토크나이저 미지원: 한국어 부분 일치 대신 단어 앞부분 일치로 검색합니다.",
+        )
+
+
+def _split_terms(query: str) -> tuple[list[str], list[str]]:
+    """검색어를 MATCH 가능한 단어와 LIKE/확장으로 처리할 짧은 단어로 나눕니다."""
+    terms = [t for t in query.split() if t]
+    long_terms = [t for t in terms if len(t) >= _MIN_TRIGRAM_TERM]
+    short_terms = [t for t in terms if len(t) < _MIN_TRIGRAM_TERM]
+    return long_terms, short_terms
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _phrase(term: str) -> str:
+    """단어를 구문으로 감싸 FTS 문법 문자를 무력화합니다."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _expand_prefix(db: Session, term: str) -> Optional[list[str]]:
+    """term으로 시작하는 인덱스의 trigram 목록. 너무 많으면 None."""
+    lo = term.lower()
+    hi = lo[:-1] + chr(ord(lo[-1]) + 1)
+    trigrams = db.execute(
+        text(f"SELECT term FROM {VOCAB_TABLE} WHERE term >= :lo AND term < :hi LIMIT :cap"),
+        {"lo": lo, "hi": hi, "cap": MAX_PREFIX_EXPANSION + 1},
+    ).scalars().all()
+    return None if len(trigrams) > MAX_PREFIX_EXPANSION else trigrams
+
+
+def _match_expression(db: Session, long_terms: list[str], short_terms: list[str]) -> tuple[list[str], list[str], bool]:
+    """(MATCH 조건 목록, LIKE로 처리할 단어, 결과가 없음이 확실한지)를 반환합니다."""
+    if _tokenizer != "trigram":
+        # 단어 토크나이저에서는 모든 검색어를 단어 앞부분 일치로 처리
+        return [_phrase(t) + " *" for t in long_terms + short_terms], [], False
+
+    matches = [_phrase(t) for t in long_terms]
+    like_terms: list[str] = []
+    for term in short_terms:
+        trigrams = _expand_prefix(db, term) if len(term) == 2 else None
+        if trigrams is None:
+            like_terms.append(term)
+        elif not trigrams:
+            return [], [], True
+        else:
+            matches.append("(" + " OR ".join(_phrase(t) for t in trigrams) + ")")
+    return matches, like_terms, False
+
+
+def _highlight(text_value: str, terms: list[str]) -> str:
+    """검색어 위치를 [ ]로 표시합니다. trigram으로 확장한 검색어는 snippet()이 세 번째 글자까지
+    표시하므로 대신 사용합니다."""
+    pattern = re.compile("|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+    return pattern.sub(lambda m: f"[{m.group(0)}]", text_value)
+
+
+def search_subtitles(
+    db: Session,
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    project_id: Optional[int] = None,
+) -> tuple[list[dict], bool]:
+    """관련도 순 검색 결과와 다음 페이지 존재 여부를 반환합니다."""
+    if not _is_sqlite(db.get_bind()):
+        return _search_like(db, query, limit, offset, project_id)
+
+    long_terms, short_terms = _split_terms(query)
+    matches, like_terms, empty = _match_expression(db, long_terms, short_terms)
+    if empty:
+        return [], False
+    if not matches:
+        # 1글자 검색어만 있는 경우: 인덱스를 쓸 수 없으므로 LIKE (프로젝트 지정 시 project_id 인덱스)
+        return _search_like(db, query, limit, offset, project_id)
+
+    conditions = [f"{FTS_TABLE} MATCH :match"]
+    params: dict = {"limit": limit + 1, "offset": offset, "match": " AND ".join(matches)}
+    for i, term in enumerate(like_terms):
+        params[f"like_{i}"] = f"%{_escape_like(term)}%"
+        conditions.append(f"s.text LIKE :like_{i} ESCAPE '\\'")
+    if project_id is not None:
+        # 프로젝트의 자막 id 범위(project_id 인덱스로 조회)를 FTS rowid 범위 조건으로 넘겨,
+        # 다른 프로젝트의 일치 항목을 읽고 버리지 않게 합니다.
+        low, high = db.execute(
+            text("SELECT min(id), max(id) FROM subtitles WHERE project_id = :project_id"),
+            {"project_id": project_id},
+        ).one()
+        if low is None:
+            return [], False
+        params.update(project_id=project_id, low=low, high=high)
+        conditions += [f"{FTS_TABLE}.rowid BETWEEN :low AND :high", "s.project_id = :project_id"]
+
+    snippet = f"snippet({FTS_TABLE}, 0, '[', ']', '…', 16)" if not short_terms else "NULL"
+    if long_terms:
+        rank, order = f"bm25({FTS_TABLE})", "rank"
+    else:
+        # 짧은 검색어만 있으면 trigram OR 확장의 bm25는 의미가 없으므로 자막 순서로 반환합니다.
+        # (FTS가 rowid 순으로 읽다가 LIMIT에서 멈추므로 일치 항목이 많아도 빠름)
+        rank, order = "0.0", f"{FTS_TABLE}.rowid"
+
+    rows = db.execute(
+        text(
+            f"SELECT s.id, s.project_id, s.start_time, s.end_time, s.text, "
+            f"{snippet} AS snippet, {rank} AS rank "
+            f"FROM {FTS_TABLE} JOIN subtitles AS s ON s.id = {FTS_TABLE}.rowid "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {order} LIMIT :limit OFFSET :offset"
+        ),
+        params,
+    ).all()
+
+    hits = [
+        {
+            "subtitle_id": row.id,
+            "project_id": row.project_id,
+            "start_time": row.start_time,
+            "end_time": row.end_time,
+            "text": row.text,
+            "snippet": row.snippet.rstrip() if row.snippet is not None else _highlight(row.text, long_terms + short_terms),
+            "rank": float(row.rank),
+        }
+        for row in rows[:limit]
+    ]
+    return hits, len(rows) > limit
+
+
+def _search_like(db: Session, query: str, limit: int, offset: int, project_id: Optional[int]):
+    q = db.query(Subtitle)
+    for term in query.split():
+        q = q.filter(Subtitle.text.ilike(f"%{_escape_like(term)}%", escape="\\"))
+    if project_id is not None:
+        q = q.filter(Subtitle.project_id == project_id)
+    rows = q.order_by(Subtitle.project_id, Subtitle.start_time).offset(offset).limit(limit + 1).all()
+    hits = [
+        {
+            "subtitle_id": s.id,
+            "project_id": s.project_id,
+            "start_time": s.start_time,
+            "end_time": s.end_time,
+            "text": s.text,
+            "snippet": s.text,
+            "rank": 0.0,
+        }
+        for s in rows[:limit]
+    ]
+    return hits, len(rows) > limit
@@ -0,0 +1,251 @@
+"""오디오 신호 기반 하이라이트 후보 구간 분석.
+
+원본 오디오를 PCM으로 한 번 디코딩해 프레임별 RMS/영교차율을 계산하고,
+자막 밀도(발화 속도)와 합쳐 30~60초 후보 구간에 점수를 매깁니다.
+상위 구간의 자막만 LLM에 보내 프롬프트 토큰과 지연 시간을 줄이는 용도입니다.
+"""
+
+import os
+import json
+import hashlib
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from analysis_cache import analysis_path, source_key
+from media_cache import media_cache
+from metrics import timed
+from scheduler import encode_scheduler
+
+load_dotenv()
+
+SAMPLE_RATE = 8000
+FRAME_SECONDS = 0.5
+WINDOW_LENGTHS = (30.0, 45.0, 60.0)
+WINDOW_HOP_SECONDS = 5.0
+
+# 상위 몇 개 구간의 자막을 LLM에 보낼지
+PREFILTER_TOP_K = int(os.getenv("HIGHLIGHT_PREFILTER_TOP_K") or 8)
+# 이 길이(초) 이상인 영상에만 사전 필터를 적용
+PREFILTER_MIN_SECONDS = float(os.getenv("HIGHLIGHT_PREFILTER_MIN_SECONDS") or 600)
+
+_FRAME_SAMPLES = int(SAMPLE_RATE * FRAME_SECONDS)
+_READ_FRAMES = 240  # 한 번에 읽을 프레임 수 (2분 분량)
+_SILENCE_DB = -45.0
+
+
+def decode_audio_features(source_path: str, project_id: Optional[int] = None) -> dict:
+    """ffmpeg로 8kHz 모노 PCM을 스트리밍 디코딩하며 프레임별 특징을 계산합니다.
+
+    전체 샘플을 메모리에 올리지 않고 프레임 단위 RMS(dB)와 영교차율만 보관합니다.
+    """
+    import ffmpeg
+
+    rms_chunks: list[np.ndarray] = []
+    zcr_chunks: list[np.ndarray] = []
+    chunk_bytes = _FRAME_SAMPLES * _READ_FRAMES * 2
+
+    with encode_scheduler.slot("audio", label=source_path) as threads:
+        with timed("signal_decode", project_id) as stage_info:
+            process = (
+                ffmpeg
+                .input(source_path)
+                .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=SAMPLE_RATE, vn=None, threads=threads)
+                .global_args("-nostdin", "-loglevel", "error")
+                .run_async(pipe_stdout=True, pipe_stderr=True)
+            )
+            remainder = b""
+            while True:
+                data = process.stdout.read(chunk_bytes)
+                if not data:
+                    break
+                data = remainder + data
+                usable = len(data) - len(data) % (_FRAME_SAMPLES * 2)
+                remainder = data[usable:]
+                if not usable:
+                    continue
+
+                frames = np.frombuffer(data[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+                frames = frames.reshape(-1, _FRAME_SAMPLES)
+                rms = np.sqrt(np.mean(frames * frames, axis=1))
+                rms_chunks.append(20.0 * np.log10(np.maximum(rms, 1e-6)))
+                signs = np.signbit(frames)
+                zcr_chunks.append(np.mean(signs[:, 1:] != signs[:, :-1], axis=1))
+
+            stderr = process.stderr.read()
+            process.wait()
+            if process.returncode != 0:
+                raise RuntimeError(f"오디오 디코딩 실패: {stderr.decode('utf-8', errors='replace')[-300:]}")
+
+            rms_db = np.concatenate(rms_chunks) if rms_chunks else np.zeros(0, dtype=np.float32)
+            zcr = np.concatenate(zcr_chunks) if zcr_chunks else np.zeros(0, dtype=np.float32)
+            stage_info["frames"] = int(rms_db.size)
+
+    return {"rms_db": rms_db, "zcr": zcr}
+
+
+def load_audio_features(project_id: int, source_path: str) -> dict:
+    """프로젝트별 캐시에서 오디오 특징을 읽고, 원본이 바뀌었으면 다시 계산합니다."""
+    cache_path = analysis_path(project_id, "audio_features.npz")
+    key = source_key(source_path)
+
+    if os.path.exists(cache_path):
+        cached = np.load(cache_path)
+        if str(cached["key"]) == key:
+            media_cache.touch(cache_path)
+            return {"rms_db": cached["rms_db"], "zcr": cached["zcr"]}
+
+    features = decode_audio_features(source_path, project_id)
+    np.savez(analysis_path(project_id, "audio_features.npz", create=True), key=np.array(key), **features)
+    media_cache.enforce("analysis")
+    return features
+
+
+def speech_rate(subtitles: list, n_frames: int) -> np.ndarray:
+    """자막을 프레임 격자에 펼쳐 프레임별 초당 글자 수를 계산합니다."""
+    rate = np.zeros(n_frames + 1, dtype=np.float64)
+    if not subtitles or not n_frames:
+        return rate[:n_frames]
+
+    starts = np.array([s.start_time for s in subtitles], dtype=np.float64)
+    ends = np.array([s.end_time for s in subtitles], dtype=np.float64)
+    chars = np.array([len(s.text.replace(" ", "")) for s in subtitles], dtype=np.float64)
+    cps = chars / np.maximum(ends - starts, 0.1)
+
+    first = np.clip((starts / FRAME_SECONDS).astype(np.int64), 0, n_frames)
+    last = np.clip(np.ceil(ends / FRAME_SECONDS).astype(np.int64), 0, n_frames)
+    # 차분 배열로 구간 덧셈을 한 번에 처리
+    np.add.at(rate, first, cps)
+    np.add.at(rate, last, -cps)
+    return np.cumsum(rate)[:n_frames]
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    std = values.std()
+    if not std:
+        return np.zeros_like(values)
+    return (values - values.mean()) / std
+
+
+def score_windows(features: dict, rate: np.ndarray) -> list[dict]:
+    """모든 후보 구간(30/45/60초, 5초 간격)의 점수를 벡터 연산으로 계산합니다."""
+    rms_db = features["rms_db"].astype(np.float64)
+    zcr = features["zcr"].astype(np.float64)
+    n = rms_db.size
+    if not n:
+        return []
+
+    # 잡음성(높은 영교차율) + 큰 음량의 급격한 상승 → 웃음/박수 유사 구간
+    median = np.median(rms_db)
+    mad = np.median(np.abs(rms_db - median)) or 1.0
+    spikes = ((rms_db > median + 3.0 * mad) & (zcr > np.percentile(zcr, 75))).astype(np.float64)
+    silence = (rms_db < max(_SILENCE_DB, np.percentile(rms_db, 10))).astype(np.float64)
+
+    def window_means(values: np.ndarray, length: int) -> np.ndarray:
+        csum = np.concatenate(([0.0], np.cumsum(values)))
+        return (csum[length:] - csum[:-length]) / length
+
+    hop = max(1, int(WINDOW_HOP_SECONDS / FRAME_SECONDS))
+    starts_all, lengths_all, loud_all, rate_all, spike_all, silence_all = [], [], [], [], [], []
+    for seconds in WINDOW_LENGTHS:
+        length = min(n, int(seconds / FRAME_SECONDS))
+        idx = np.arange(0, n - length + 1, hop)
+        starts_all.append(idx)
+        lengths_all.append(np.full(idx.size, length))
+        loud_all.append(window_means(rms_db, length)[idx])
+        rate_all.append(window_means(rate, length)[idx])
+        spike_all.append(window_means(spikes, length)[idx])
+        silence_all.append(window_means(silence, length)[idx])
+        if length == n:
+            break
+
+    starts = np.concatenate(starts_all)
+    lengths = np.concatenate(lengths_all)
+    loudness = np.concatenate(loud_all)
+    rates = np.concatenate(rate_all)
+    spike_density = np.concatenate(spike_all)
+    silence_ratio = np.concatenate(silence_all)
+
+    scores = (
+        _zscore(loudness)
+        + _zscore(rates)
+        + 0.5 * _zscore(spike_density)
+        - 1.5 * silence_ratio
+    )
+
+    return [
+        {
+            "start": round(float(starts[i] * FRAME_SECONDS), 2),
+            "end": round(float((starts[i] + lengths[i]) * FRAME_SECONDS), 2),
+            "score": round(float(scores[i]), 4),
+            "loudness_db": round(float(loudness[i]), 2),
+            "speech_rate": round(float(rates[i]), 2),
+            "spike_density": round(float(spike_density[i]), 4),
+            "silence_ratio": round(float(silence_ratio[i]), 4),
+        }
+        for i in range(scores.size)
+    ]
+
+
+def select_top_windows(windows: list[dict], k: int = PREFILTER_TOP_K) -> list[dict]:
+    """점수 순으로 서로 겹치지 않는 상위 k개 구간을 골라 시간순으로 반환합니다."""
+    selected: list[dict] = []
+    for window in sorted(windows, key=lambda w: w["score"], reverse=True):
+        if len(selected) >= k:
+            break
+        if all(window["end"] <= s["start"] or window["start"] >= s["end"] for s in selected):
+            selected.append(window)
+    return sorted(selected, key=lambda w: w["start"])
+
+
+def _subtitles_digest(subtitles: list) -> str:
+    digest = hashlib.sha1()
+    for s in subtitles:
+        digest.update(f"{s.start_time:.3f},{s.end_time:.3f},{len(s.text)};".encode())
+    return digest.hexdigest()
+
+
+def candidate_windows(project_id: int, source_path: str, subtitles: list) -> list[dict]:
+    """상위 후보 구간을 반환합니다. 결과는 원본/자막이 같으면 프로젝트별로 재사용됩니다."""
+    cache_path = analysis_path(project_id, "highlight_candidates.json")
+    key = source_key(source_path)
+    subtitles_key = _subtitles_digest(subtitles)
+
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if cached.get("source_key") == key and cached.get("subtitles_key") == subtitles_key:
+            return cached["windows"]
+
+    with timed("signal_analysis", project_id) as stage_info:
+        features = load_audio_features(project_id, source_path)
+        rate = speech_rate(subtitles, features["rms_db"].size)
+        windows = select_top_windows(score_windows(features, rate))
+        stage_info["windows"] = len(windows)
+
+    with open(analysis_path(project_id, "highlight_candidates.json", create=True), "w") as f:
+        json.dump(
+            {"source_key": key, "subtitles_key": subtitles_key, "windows": windows},
+            f,
+            ensure_ascii=False,
+        )
+    media_cache.enforce("analysis")
+    return windows
+
+
+def cached_candidate_windows(project_id: int) -> Optional[list[dict]]:
+    """분석 없이 캐시된 후보 구간만 읽습니다."""
+    cache_path = analysis_path(project_id, "highlight_candidates.json")
+    if not os.path.exists(cache_path):
+        return None
+    with open(cache_path) as f:
+        return json.load(f)["windows"]
+
+
+def filter_subtitles(subtitles: list, windows: list[dict]) -> list[tuple[dict, list]]:
+    """각 후보 구간과 그 구간에 걸친 자막 목록을 짝지어 반환합니다."""
+    return [
+        (window, [s for s in subtitles if s.end_time > window["start"] and s.start_time < window["end"]])
+        for window in windows
+    ]
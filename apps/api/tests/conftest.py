@@ -0,0 +1,5 @@
+import os
+import sys
+
+# apps/api의 평면 모듈(reframe, jobs ...)을 테스트에서 import할 수 있게 합니다.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
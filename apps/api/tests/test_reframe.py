@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+import reframe
+
+WINDOW = round(reframe.SAMPLE_WIDTH * 9 / 16 * 9 / 16)  # 16:9 원본에서 9:16 크롭 창 폭
+
+
+@pytest.mark.parametrize("blob", [(20, 26), (70, 74), (130, 138)])
+def test_single_blob_is_centered(blob):
+    """창보다 좁은 대상은 크롭 가장자리가 아니라 창 가운데에 와야 합니다."""
+    saliency = np.zeros((1, reframe.SAMPLE_WIDTH), dtype=np.float32)
+    saliency[0, blob[0]:blob[1]] = 1.0
+
+    center = reframe._window_centers(saliency, WINDOW)[0] * reframe.SAMPLE_WIDTH
+
+    assert center == pytest.approx((blob[0] + blob[1]) / 2, abs=0.5)
+
+
+def test_flat_saliency_has_no_confident_center():
+    saliency = np.ones((1, reframe.SAMPLE_WIDTH), dtype=np.float32)
+
+    assert np.isnan(reframe._window_centers(saliency, WINDOW)[0])
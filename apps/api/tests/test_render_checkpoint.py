@@ -0,0 +1,20 @@
+import pytest
+
+from render_checkpoint import plan_time_chunks
+
+
+def test_full_render_chunks_start_on_keyframes():
+    keyframes = [i * 1.6016 for i in range(20)]
+
+    ranges = plan_time_chunks(30.0, keyframes, chunk_seconds=5.0)
+
+    # 각 청크는 목표 시각 이후 첫 키프레임 바로 앞에서 시작하고, 앞 청크는 그 직전에서 끝남
+    assert [start for start, _ in ranges] == pytest.approx([0.0, 6.4064, 12.8128, 19.2192, 25.6256], abs=1e-3)
+    for (start, length), (next_start, _) in zip(ranges, ranges[1:]):
+        assert start + length == pytest.approx(next_start)
+    assert ranges[-1][1] is None
+
+
+def test_short_or_unknown_duration_is_one_chunk():
+    assert plan_time_chunks(None, []) == [(0.0, None)]
+    assert plan_time_chunks(4.0, [0.0, 2.0], chunk_seconds=5.0) == [(0.0, None)]
@@ -0,0 +1,272 @@
+"""에디터 타임라인용 파형 피크와 장면 전환 인덱스.
+
+원본을 ffmpeg로 한 번만 디코딩하면서 오디오는 PCM 파이프로 받아 여러 줌 레벨의
+min/max 피크를 만들고, 영상은 축소 후 scene 점수로 장면 전환 시각을 기록합니다.
+
+waveform.bin 형식 (리틀 엔디언):
+    헤더   : magic "ACWF", version u16, level_count u16, sample_rate u32
+    레벨표 : level_count × (samples_per_peak u32, peak_count u32, offset u64)
+    데이터 : 레벨별 int8 [min, max] 쌍 × peak_count
+"""
+
+import os
+import re
+import json
+import struct
+import subprocess
+from typing import Optional
+
+import numpy as np
+
+from analysis_cache import analysis_path, source_key
+from media_cache import media_cache
+from metrics import timed
+from scheduler import encode_scheduler
+from jobs import current_job
+
+SAMPLE_RATE = 8000
+BASE_SAMPLES_PER_PEAK = 80  # 100 peaks/s
+ZOOM_FACTOR = 4
+LEVEL_COUNT = 4  # 100, 25, 6.25, 1.5625 peaks/s
+SCENE_THRESHOLD = 0.3
+SCENE_SNAP_SECONDS = float(os.getenv("HIGHLIGHT_SNAP_SECONDS") or 1.5)
+
+WAVEFORM_MAGIC = b"ACWF"
+WAVEFORM_VERSION = 1
+_HEADER = struct.Struct("<4sHHI")
+_LEVEL = struct.Struct("<IIQ")
+
+# 가장 거친 레벨의 한 피크가 청크 경계에 걸치지 않도록 청크 크기를 맞춥니다.
+_CHUNK_SAMPLES = BASE_SAMPLES_PER_PEAK * ZOOM_FACTOR ** (LEVEL_COUNT - 1) * 64
+
+# `ffmpeg -i` 출력 예: "  Stream #0:1[0x2](und): Audio: aac (LC) ..., Duration: 00:02:00.05"
+_STREAM_LINE = re.compile(r"Stream #\d+:\d+.*?: (Video|Audio):")
+_DURATION_LINE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def waveform_path(project_id: int) -> str:
+    return analysis_path(project_id, "waveform.bin")
+
+
+def scenes_path(project_id: int) -> str:
+    return analysis_path(project_id, "scenes.json")
+
+
+def meta_path(project_id: int) -> str:
+    return analysis_path(project_id, "timeline_meta.json")
+
+
+def probe_streams(source_path: str) -> dict:
+    """원본의 오디오/영상 스트림 유무와 길이(초)를 구합니다.
+
+    ffprobe가 없으면 `ffmpeg -i` 출력의 스트림 목록으로 판별합니다. 커버 이미지(attached pic)는
+    영상 스트림으로 치지 않습니다.
+    """
+    import ffmpeg
+
+    try:
+        info = ffmpeg.probe(source_path)
+        types = {
+            s.get("codec_type") for s in info["streams"]
+            if not s.get("disposition", {}).get("attached_pic")
+        }
+        duration = info.get("format", {}).get("duration")
+        return {"audio": "audio" in types, "video": "video" in types, "duration": float(duration) if duration else None}
+    except Exception:
+        pass
+
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-nostdin", "-i", source_path], capture_output=True)
+    stderr = result.stderr.decode("utf-8", errors="replace")
+    types = set()
+    for line in stderr.splitlines():
+        match = _STREAM_LINE.search(line)
+        if match and "(attached pic)" not in line:
+            types.add(match.group(1).lower())
+    match = _DURATION_LINE.search(stderr)
+    duration = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3)) if match else None
+    return {"audio": "audio" in types, "video": "video" in types, "duration": duration}
+
+
+def _downsample(mins: np.ndarray, maxs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    pad = (-mins.size) % ZOOM_FACTOR
+    if pad:
+        mins = np.concatenate([mins, np.full(pad, mins[-1] if mins.size else 0, dtype=mins.dtype)])
+        maxs = np.concatenate([maxs, np.full(pad, maxs[-1] if maxs.size else 0, dtype=maxs.dtype)])
+    return (
+        mins.reshape(-1, ZOOM_FACTOR).min(axis=1),
+        maxs.reshape(-1, ZOOM_FACTOR).max(axis=1),
+    )
+
+
+def _write_waveform(path: str, mins: np.ndarray, maxs: np.ndarray) -> list[dict]:
+    """줌 레벨별 피크를 만들어 waveform.bin에 기록하고 레벨 정보를 반환합니다."""
+    levels = []
+    payloads = []
+    samples_per_peak = BASE_SAMPLES_PER_PEAK
+    for _ in range(LEVEL_COUNT):
+        # int16 → int8 양자화, [min, max] 쌍으로 교차 배치
+        pairs = np.empty(mins.size * 2, dtype=np.int8)
+        pairs[0::2] = (mins >> 8).astype(np.int8)
+        pairs[1::2] = (maxs >> 8).astype(np.int8)
+        payloads.append(pairs.tobytes())
+        levels.append({"samples_per_peak": samples_per_peak, "peak_count": int(mins.size)})
+        mins, maxs = _downsample(mins, maxs)
+        samples_per_peak *= ZOOM_FACTOR
+
+    offset = _HEADER.size + _LEVEL.size * LEVEL_COUNT
+    for level, payload in zip(levels, payloads):
+        level["offset"] = offset
+        level["length"] = len(payload)
+        level["peaks_per_second"] = SAMPLE_RATE / level["samples_per_peak"]
+        offset += len(payload)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(WAVEFORM_MAGIC, WAVEFORM_VERSION, LEVEL_COUNT, SAMPLE_RATE))
+        for level in levels:
+            f.write(_LEVEL.pack(level["samples_per_peak"], level["peak_count"], level["offset"]))
+        for payload in payloads:
+            f.write(payload)
+    os.replace(tmp_path, path)
+    return levels
+
+
+def _parse_scene_log(path: str) -> list[dict]:
+    """metadata=print 출력에서 (pts_time, scene_score)를 추출합니다."""
+    scenes: list[dict] = []
+    if not os.path.exists(path):
+        return scenes
+    current_time: Optional[float] = None
+    with open(path) as f:
+        for line in f:
+            if "pts_time:" in line:
+                current_time = float(line.rsplit("pts_time:", 1)[1].split()[0])
+            elif line.startswith("lavfi.scene_score=") and current_time is not None:
+                scenes.append({"time": round(current_time, 3), "score": round(float(line.split("=", 1)[1]), 4)})
+                current_time = None
+    return scenes
+
+
+def analyze_timeline(project_id: int, source_path: str) -> dict:
+    """원본을 한 번 디코딩해 파형 피크 파일과 장면 전환 인덱스를 생성합니다.
+
+    오디오가 없는 원본은 빈 파형을, 영상이 없는 원본은 빈 장면 목록을 기록합니다.
+    """
+    import ffmpeg
+
+    streams = probe_streams(source_path)
+    if not (streams["audio"] or streams["video"]):
+        raise RuntimeError(f"오디오/영상 스트림이 없습니다: {source_path}")
+
+    scene_log = analysis_path(project_id, "scenes.log", create=True)
+    mins_chunks: list[np.ndarray] = []
+    maxs_chunks: list[np.ndarray] = []
+    total_samples = 0
+
+    with encode_scheduler.slot("draft", label=source_path) as threads:
+        with timed("timeline_analysis", project_id) as stage_info:
+            inp = ffmpeg.input(source_path)
+            outputs = []
+            if streams["audio"]:
+                outputs.append(inp.audio.output(
+                    "pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=SAMPLE_RATE
+                ))
+            if streams["video"]:
+                outputs.append(
+                    inp.video
+                    .filter("scale", 160, -2)
+                    .filter("select", f"gt(scene,{SCENE_THRESHOLD})")
+                    # Windows 경로는 '/'로 바꿔 필터 인자에 역슬래시가 남지 않게 합니다.
+                    # (':'와 따옴표는 ffmpeg-python이 필터그래프 규칙대로 이스케이프)
+                    .filter("metadata", "print", file=scene_log.replace("\\", "/"))
+                    .output(os.devnull, format="null")
+                )
+            process = (
+                ffmpeg.merge_outputs(*outputs)
+                .global_args("-nostdin", "-loglevel", "error", "-threads", str(threads))
+                .overwrite_output()
+                .run_async(pipe_stdout=True, pipe_stderr=True)
+            )
+            job = current_job()
+            if job is not None:
+                job.attach(process)
+
+            remainder = b""
+            while True:
+                data = process.stdout.read(_CHUNK_SAMPLES * 2)
+                if not data:
+                    break
+                data = remainder + data
+                usable = len(data) - len(data) % (BASE_SAMPLES_PER_PEAK * 2)
+                remainder = data[usable:]
+                if not usable:
+                    continue
+                samples = np.frombuffer(data[:usable], dtype=np.int16).reshape(-1, BASE_SAMPLES_PER_PEAK)
+                mins_chunks.append(samples.min(axis=1))
+                maxs_chunks.append(samples.max(axis=1))
+                total_samples += samples.size
+
+            stderr = process.stderr.read()
+            process.wait()
+            if job is not None:
+                job.detach(process)
+                if job.cancelled and os.path.exists(scene_log):
+                    os.remove(scene_log)
+                job.check()
+            if process.returncode != 0:
+                raise RuntimeError(f"타임라인 분석 실패: {stderr.decode('utf-8', errors='replace')[-300:]}")
+
+            mins = np.concatenate(mins_chunks) if mins_chunks else np.zeros(0, dtype=np.int16)
+            maxs = np.concatenate(maxs_chunks) if maxs_chunks else np.zeros(0, dtype=np.int16)
+            levels = _write_waveform(waveform_path(project_id), mins, maxs)
+
+            scenes = _parse_scene_log(scene_log)
+            if os.path.exists(scene_log):
+                os.remove(scene_log)
+
+            duration = total_samples / SAMPLE_RATE if streams["audio"] else streams["duration"] or 0.0
+            meta = {
+                "source_key": source_key(source_path),
+                "duration": round(duration, 3),
+                "has_audio": streams["audio"],
+                "has_video": streams["video"],
+                "sample_rate": SAMPLE_RATE,
+                "format": "int8 [min, max] pairs",
+                "levels": levels,
+                "scene_threshold": SCENE_THRESHOLD,
+                "scene_count": len(scenes),
+            }
+            with open(scenes_path(project_id), "w") as f:
+                json.dump({"threshold": SCENE_THRESHOLD, "scenes": scenes}, f)
+            with open(meta_path(project_id), "w") as f:
+                json.dump(meta, f)
+            media_cache.enforce("analysis")
+
+            stage_info.update(duration=meta["duration"], scenes=len(scenes))
+
+    return meta
+
+
+def load_meta(project_id: int) -> Optional[dict]:
+    path = meta_path(project_id)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_scenes(project_id: int) -> list[dict]:
+    path = scenes_path(project_id)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)["scenes"]
+
+
+def snap_to_scene(t: float, scene_times: np.ndarray, tolerance: float = SCENE_SNAP_SECONDS) -> float:
+    """tolerance 이내에 장면 전환이 있으면 가장 가까운 전환 시각으로 옮깁니다."""
+    if not scene_times.size:
+        return t
+    idx = int(np.abs(scene_times - t).argmin())
+    nearest = float(scene_times[idx])
+    return nearest if abs(nearest - t) <= tolerance else t
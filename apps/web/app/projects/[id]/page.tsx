@@ -18,6 +18,13 @@ const RenderPanel = dynamic(
 
 const PROCESSING_STATUSES = ["downloading", "transcribing", "highlighting", "rendering"];
 
+// 취소 가능한 작업 상태 → 취소 API
+const CANCEL_ACTIONS: Record<string, (id: number) => Promise<unknown>> = {
+  downloading: projectApi.cancelDownload,
+  transcribing: projectApi.cancelTranscribe,
+  rendering: projectApi.cancelRender,
+};
+
 function formatTime(seconds: number) {
   const m = Math.floor(seconds / 60);
   const s = Math.floor(seconds % 60);
@@ -252,6 +259,15 @@ export default function ProjectPage() {
           <div className="mt-4 flex items-center gap-2 text-sm text-white/40">
             <span className="w-3 h-3 border-2 border-current border-t-transparent rounded-full animate-spin" />
             {STATUS_LABELS[project.status]} — 완료 후 자동으로 갱신됩니다
+            {CANCEL_ACTIONS[project.status] && (
+              <button
+                onClick={() => handleAction("cancel", () => CANCEL_ACTIONS[project.status](projectId))}
+                disabled={actionLoading === "cancel"}
+                className="ml-auto text-xs text-red-400/70 hover:text-red-300 underline transition-colors disabled:opacity-40"
+              >
+                취소
+              </button>
+            )}
           </div>
         )}
       </div>
@@ -313,6 +329,7 @@ export default function ProjectPage() {
               projectId={projectId}
               status={project.status}
               outputPath={project.output_path}
+              outputUrl={project.output_url}
               highlights={highlights}
               isProcessing={isProcessing}
               onRenderStart={handleRenderStart}
@@ -7,6 +7,7 @@ interface RenderPanelProps {
   projectId: number;
   status: string;
   outputPath: string | null;
+  outputUrl: string | null;
   highlights: Highlight[];
   isProcessing: boolean;
   onRenderStart: (highlightIds?: number[]) => void;
@@ -55,6 +56,7 @@ export default function RenderPanel({
   projectId,
   status,
   outputPath,
+  outputUrl: publishedUrl,
   highlights,
   isProcessing,
   onRenderStart,
@@ -116,7 +118,7 @@ export default function RenderPanel({
     onRenderStart(ids);
   };
 
-  const outputUrl = projectApi.getOutputUrl(projectId);
+  const outputUrl = projectApi.getOutputUrl(projectId, publishedUrl);
   const downloadUrl = projectApi.downloadOutput(projectId);
 
   // ── 완료 상태 ──
@@ -16,6 +16,7 @@ export interface Project {
   source_url: string | null;
   source_path: string | null;
   output_path: string | null;
+  output_url: string | null;
   created_at: string;
 }
 
@@ -66,6 +67,7 @@ export interface RenderProgress {
   progress: number;
   stage: string;
   output_url: string | null;
+  hls_url: string | null;
 }
 
 export const projectApi = {
@@ -76,17 +78,21 @@ export const projectApi = {
   delete: (id: number) => api.delete(`/projects/${id}`),
   getStatus: (id: number) => api.get<{ id: number; status: string }>(`/projects/${id}/status`),
   download: (id: number) => api.post(`/projects/${id}/download`),
+  cancelDownload: (id: number) => api.post(`/projects/${id}/download/cancel`),
   transcribe: (id: number) => api.post(`/projects/${id}/transcribe`),
+  cancelTranscribe: (id: number) => api.post(`/projects/${id}/transcribe/cancel`),
   highlight: (id: number) => api.post(`/projects/${id}/highlight`),
   getHighlights: (id: number) => api.get<Highlight[]>(`/projects/${id}/highlights`),
-  render: (id: number, options?: { highlight_ids?: number[] }) =>
+  render: (id: number, options?: { highlight_ids?: number[]; smart_crop?: boolean }) =>
     api.post(`/projects/${id}/render`, options ?? {}),
+  cancelRender: (id: number) => api.post(`/projects/${id}/render/cancel`),
   getRenderProgress: (id: number) =>
     api.get<RenderProgress>(`/projects/${id}/render/progress`),
   getSubtitles: (id: number) => api.get<Subtitle[]>(`/projects/${id}/subtitles`),
   updateSubtitles: (id: number, subtitles: object[]) =>
     api.put(`/projects/${id}/subtitles`, { subtitles }),
   getVideoUrl: (id: number) => `${API_BASE}/projects/${id}/video`,
-  getOutputUrl: (id: number) => `${API_BASE}/media/outputs/${id}/final.mp4`,
+  getOutputUrl: (id: number, outputUrl?: string | null) =>
+    outputUrl ? `${API_BASE}${outputUrl}` : `${API_BASE}/media/outputs/${id}/final.mp4`,
   downloadOutput: (id: number) => `${API_BASE}/projects/${id}/output`,
 };